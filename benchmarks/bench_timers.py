@@ -0,0 +1,157 @@
+"""
+Сравнение структур таймеров планировщика: мин-кучи, иерархического колеса
+таймеров и библиотеки schedule (если она установлена) на вставке, отмене и
+срабатывании заданий.
+
+Запуск из корня проекта:
+
+    python -m benchmarks.bench_timers --jobs 100000
+"""
+import argparse
+import random
+import time
+
+from controllers.task_controller import ScheduledJob
+from controllers.timers import HeapTimerQueue, TimingWheel
+
+try:
+    import schedule
+except ImportError:
+    schedule = None
+
+
+def noop():
+    pass
+
+
+def make_jobs(count, now, horizon):
+    return [
+        ScheduledJob(now + random.random() * horizon, task_id, noop, (), {})
+        for task_id in range(count)
+    ]
+
+
+def bench_timer_queue(timer_class, count, cancel_count, now, horizon, polls):
+    """
+    Замеряет вставку, отмену и срабатывание для структуры таймеров.
+
+    :return: Словарь с количеством операций в секунду.
+    """
+    timers = timer_class(now=now)
+    jobs = make_jobs(count, now, horizon)
+
+    started = time.perf_counter()
+    for job in jobs:
+        timers.push(job)
+    insert_time = time.perf_counter() - started
+
+    cancelled = random.sample(jobs, cancel_count)
+    started = time.perf_counter()
+    for job in cancelled:
+        job.cancelled = True
+        timers.cancel(job)
+    cancel_time = time.perf_counter() - started
+
+    # Время идет шагами до конца горизонта, как при пробуждениях планировщика
+    fired = 0
+    started = time.perf_counter()
+    for step in range(1, polls + 1):
+        for job in timers.pop_due(now + horizon * step / polls):
+            job.func()
+            fired += 1
+    fire_time = time.perf_counter() - started
+
+    return {
+        "insert": count / insert_time,
+        "cancel": cancel_count / cancel_time,
+        "fire": fired / fire_time,
+    }
+
+
+def bench_schedule(count, cancel_count, horizon):
+    """
+    Замеряет те же операции для библиотеки schedule, которую планировщик
+    использовал раньше. Отмена в ней перебирает все задания, поэтому
+    количество заданий стоит брать меньше.
+
+    :return: Словарь с количеством операций в секунду.
+    """
+    scheduler = schedule.Scheduler()
+
+    def job_that_deletes_itself():
+        return schedule.CancelJob
+
+    started = time.perf_counter()
+    for task_id in range(count):
+        delay = random.random() * horizon
+        scheduler.every(delay).seconds.do(job_that_deletes_itself).tag(task_id)
+    insert_time = time.perf_counter() - started
+
+    started = time.perf_counter()
+    for task_id in random.sample(range(count), cancel_count):
+        scheduler.clear(task_id)
+    cancel_time = time.perf_counter() - started
+
+    # Сдвигаем время запуска всех заданий в прошлое, чтобы они сработали
+    for job in scheduler.jobs:
+        job.next_run -= job.period
+    fired = len(scheduler.jobs)
+    started = time.perf_counter()
+    scheduler.run_pending()
+    fire_time = time.perf_counter() - started
+
+    return {
+        "insert": count / insert_time,
+        "cancel": cancel_count / cancel_time,
+        "fire": fired / fire_time,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--jobs", type=int, default=100000,
+                        help="количество заданий для кучи и колеса")
+    parser.add_argument("--schedule-jobs", type=int, default=10000,
+                        help="количество заданий для schedule")
+    parser.add_argument("--cancel-ratio", type=float, default=0.1,
+                        help="доля отменяемых заданий")
+    parser.add_argument("--horizon", type=float, default=86400.0,
+                        help="разброс сроков заданий в секундах")
+    parser.add_argument("--polls", type=int, default=10000,
+                        help="количество пробуждений при срабатывании")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    random.seed(args.seed)
+    now = time.time()
+    results = {}
+
+    for name, timer_class in (("heap", HeapTimerQueue), ("wheel", TimingWheel)):
+        results[name] = bench_timer_queue(
+            timer_class,
+            args.jobs,
+            int(args.jobs * args.cancel_ratio),
+            now,
+            args.horizon,
+            args.polls,
+        )
+
+    if schedule is not None:
+        results["schedule"] = bench_schedule(
+            args.schedule_jobs,
+            int(args.schedule_jobs * args.cancel_ratio),
+            args.horizon,
+        )
+    else:
+        print("Библиотека schedule не установлена, ее замер пропущен.")
+
+    print(f"{'backend':<10}{'insert/s':>14}{'cancel/s':>14}{'fire/s':>14}")
+    for name, result in results.items():
+        print(
+            f"{name:<10}{result['insert']:>14,.0f}"
+            f"{result['cancel']:>14,.0f}{result['fire']:>14,.0f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
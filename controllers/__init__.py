@@ -1,7 +1,23 @@
 from .task_controller import (
     TaskScheduler,
 )
+from .reminders import (
+    reschedule_task_reminder,
+    restore_reminders,
+    schedule_task_reminder,
+    send_reminder,
+)
+from .archive import (
+    archive_tasks,
+    schedule_archiving,
+)
 
 __all__ = [
     'TaskScheduler',
+    'reschedule_task_reminder',
+    'restore_reminders',
+    'schedule_task_reminder',
+    'send_reminder',
+    'archive_tasks',
+    'schedule_archiving',
 ]
\ No newline at end of file
@@ -0,0 +1,97 @@
+import logging
+import time
+from datetime import datetime, timedelta
+
+from database import archive_completed_tasks, reactivate_recurring_tasks
+
+from .reminders import send_reminder
+from .task_controller import TaskScheduler
+
+logger = logging.getLogger(__name__)
+
+# ID служебного задания архивации в планировщике. Отрицательный, чтобы не
+# совпасть с ID задач
+ARCHIVE_JOB_ID = -1
+
+# Через сколько дней после завершения задача переносится в архив
+ARCHIVE_AFTER_DAYS = 30
+
+# Период архивации и задержка первого запуска после старта приложения в
+# секундах
+ARCHIVE_INTERVAL = 3600
+ARCHIVE_START_DELAY = 60
+
+# Наибольшая длительность одного запуска в секундах. Запуск выполняется в
+# пуле служебных заданий планировщика, поэтому должен уложиться в его
+# SERVICE_TIMEOUT. Оставшиеся задачи переносятся при следующем запуске
+ARCHIVE_TIME_BUDGET = 5.0
+
+
+def reactivate_tasks():
+    """
+    Возвращает завершенные повторяющиеся задачи к следующему повторению и
+    планирует их напоминания.
+
+    :return: Количество возвращенных задач.
+    :rtype: int
+    """
+    result, reactivated = reactivate_recurring_tasks()
+    if not result:
+        logger.error("Не удалось вернуть повторяющиеся задачи: %s", reactivated)
+        return 0
+
+    TaskScheduler().schedule_tasks(
+        (
+            (task_id, fire_time, send_reminder, (task_name, category_name), rule.next_timestamp)
+            for task_id, task_name, category_name, fire_time, rule in reactivated
+        )
+    )
+    return len(reactivated)
+
+
+def archive_tasks():
+    """
+    Переносит в архив задачи, завершенные больше ARCHIVE_AFTER_DAYS дней
+    назад. Задачи переносятся пачками, каждая своей транзакцией, пока они
+    не закончатся или не истечет ARCHIVE_TIME_BUDGET. Перед этим
+    завершенные повторяющиеся задачи возвращаются к следующему повторению.
+
+    :return: Количество перенесенных задач.
+    :rtype: int
+    """
+    started = time.perf_counter()
+
+    reactivated = reactivate_tasks()
+    if reactivated:
+        logger.info("Возвращено к следующему повторению задач: %d", reactivated)
+    before = datetime.now() - timedelta(days=ARCHIVE_AFTER_DAYS)
+
+    archived = 0
+    while time.perf_counter() - started < ARCHIVE_TIME_BUDGET:
+        result, count = archive_completed_tasks(before)
+        if not result:
+            logger.error("Не удалось перенести задачи в архив: %s", count)
+            break
+
+        archived += count
+        if count == 0:
+            break
+
+    if archived:
+        logger.info(
+            "Перенесено в архив задач: %d за %.3f с",
+            archived, time.perf_counter() - started,
+        )
+    return archived
+
+
+def schedule_archiving():
+    """
+    Планирует периодическую архивацию завершенных задач в TaskScheduler.
+    """
+    TaskScheduler().schedule_service_job(
+        ARCHIVE_JOB_ID,
+        ARCHIVE_INTERVAL,
+        archive_tasks,
+        delay=ARCHIVE_START_DELAY,
+    )
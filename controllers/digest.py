@@ -0,0 +1,184 @@
+import logging
+import time
+from threading import Condition, Thread
+
+logger = logging.getLogger(__name__)
+
+
+class TokenBucket:
+    """
+    Ограничитель частоты по алгоритму маркерного ведра.
+
+    Ведро вмещает capacity маркеров и пополняется со скоростью rate
+    маркеров в секунду; каждое действие забирает один маркер. Не
+    потокобезопасен: используется из одного потока.
+    """
+
+    __slots__ = ("rate", "capacity", "tokens", "updated")
+
+    def __init__(self, rate, capacity, now=None):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = float(capacity)
+        self.updated = time.monotonic() if now is None else now
+
+    def acquire(self, now):
+        """
+        Забирает маркер, если он есть.
+
+        :param now: Текущее время в секундах по монотонным часам.
+
+        :return: 0, если маркер получен, иначе время в секундах до
+                 появления следующего маркера.
+        :rtype: float
+        """
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+
+class NotificationDigest:
+    """
+    Объединяет уведомления, поступающие серией, в одно сводное.
+
+    Уведомления накапливаются, пока между ними проходит не больше window
+    секунд (но не дольше max_delay от первого), после чего все накопленное
+    передается одной функции callback. Вызовы callback дополнительно
+    ограничены маркерным ведром: не больше rate_per_minute в минуту с
+    запасом burst. Пока маркера нет, уведомления продолжают накапливаться
+    и попадают в ту же сводку, поэтому при пиковой нагрузке вместо сотен
+    уведомлений отправляется несколько.
+
+    Серии собираются отдельным потоком, который запускается при
+    поступлении первого уведомления. Сама отправка передается функции
+    submit (пулу NotificationDispatcher), поэтому зависший вызов
+    уведомления не задерживает следующие сводки, а его длительность
+    попадает в статистику пула. Накапливается не больше max_pending
+    уведомлений, остальные отбрасываются и учитываются в статистике.
+    """
+
+    # Пауза в секундах, после которой серия уведомлений считается законченной
+    WINDOW = 0.5
+    # Наибольшая задержка первого уведомления серии в секундах
+    MAX_DELAY = 5.0
+
+    # Ограничение частоты отправки сводок
+    RATE_PER_MINUTE = 6
+    BURST = 3
+
+    # Наибольшее количество накопленных уведомлений
+    MAX_PENDING = 10000
+
+    def __init__(
+            self,
+            callback,
+            submit=None,
+            window=None,
+            max_delay=None,
+            rate_per_minute=None,
+            burst=None,
+            max_pending=None
+    ):
+        """
+        :param callback: Функция, принимающая список накопленных уведомлений.
+        :param submit: Функция submit(func, args), выполняющая вызов
+                       callback вне потока сводок, например, в пуле
+                       NotificationDispatcher. По умолчанию callback
+                       вызывается в потоке сводок.
+        :param window: Пауза, завершающая серию, в секундах.
+        :param max_delay: Наибольшая задержка первого уведомления в секундах.
+        :param rate_per_minute: Наибольшее количество вызовов callback в минуту.
+        :param burst: Количество вызовов, допустимых подряд без ожидания.
+        :param max_pending: Наибольшее количество накопленных уведомлений.
+        """
+        self.callback = callback
+        self.submit = submit
+        self.window = window or self.WINDOW
+        self.max_delay = max_delay or self.MAX_DELAY
+        self.max_pending = max_pending or self.MAX_PENDING
+        self._bucket = TokenBucket(
+            (rate_per_minute or self.RATE_PER_MINUTE) / 60,
+            burst or self.BURST,
+        )
+
+        self._condition = Condition()
+        self._pending = []
+        self._last_added = None
+        self.thread = None
+
+        self._received = 0
+        self._sent = 0
+        self._dropped = 0
+
+    def add(self, item):
+        """
+        Добавляет уведомление в текущую серию.
+
+        :param item: Уведомление в том виде, в котором его ожидает callback.
+        """
+        with self._condition:
+            self._received += 1
+            if len(self._pending) >= self.max_pending:
+                self._dropped += 1
+                return
+            self._pending.append(item)
+            self._last_added = time.monotonic()
+
+            if self.thread is None:
+                self.thread = Thread(target=self.run_continuously)
+                self.thread.daemon = True
+                self.thread.start()
+            self._condition.notify()
+
+    def stats(self):
+        """
+        :return: Словарь с количеством поступивших уведомлений, отправленных
+                 сводок, ожидающих отправки и отброшенных уведомлений.
+        :rtype: dict
+        """
+        with self._condition:
+            return {
+                "received": self._received,
+                "sent": self._sent,
+                "pending": len(self._pending),
+                "dropped": self._dropped,
+            }
+
+    def run_continuously(self):
+        while True:
+            items = self._wait_for_series()
+            try:
+                if self.submit is None:
+                    self.callback(items)
+                else:
+                    self.submit(self.callback, (items,))
+            except Exception:
+                logger.exception("Ошибка при отправке сводного уведомления")
+
+    def _wait_for_series(self):
+        """
+        Ожидает окончания серии и маркера на отправку.
+
+        :return: Список уведомлений серии.
+        """
+        with self._condition:
+            while not self._pending:
+                self._condition.wait()
+            started = time.monotonic()
+
+            while True:
+                now = time.monotonic()
+                quiet_until = min(self._last_added + self.window, started + self.max_delay)
+                if now < quiet_until:
+                    self._condition.wait(quiet_until - now)
+                    continue
+
+                delay = self._bucket.acquire(now)
+                if not delay:
+                    items, self._pending = self._pending, []
+                    self._sent += 1
+                    return items
+                self._condition.wait(delay)
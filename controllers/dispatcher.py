@@ -0,0 +1,198 @@
+import logging
+import time
+from queue import Full, Queue
+from threading import Lock, Thread, current_thread
+
+from .metrics import Histogram
+
+logger = logging.getLogger(__name__)
+
+
+class NotificationDispatcher:
+    """
+    Пул потоков, выполняющих уведомления вне потока планировщика.
+    Служебные задания планировщика выполняются в отдельном экземпляре пула.
+
+    Задания попадают в ограниченную очередь и разбираются несколькими
+    рабочими потоками. Постановка в очередь никогда не блокирует: при
+    переполнении задание отбрасывается и учитывается в статистике.
+    Зависшее дольше timeout секунд выполнение не прерывается (в Python
+    поток нельзя остановить), но его поток выводится из пула и заменяется
+    новым, чтобы остальные уведомления не ждали. Одновременно выведенных
+    потоков заменяется не больше max_abandoned: дальше зависшие потоки не
+    заменяются, чтобы их число не росло без ограничения, а после
+    завершения зависшего вызова поток возвращается в пул.
+
+    Пул собирает гистограммы опоздания срабатывания (от назначенного
+    времени до начала вызова) и длительности вызова для каждой функции
+    отправки уведомлений.
+    """
+
+    WORKERS = 2
+    QUEUE_SIZE = 1024
+    TIMEOUT = 10.0
+
+    # Наибольшее количество выведенных из пула потоков, которые заменяются
+    MAX_ABANDONED = 8
+
+    def __init__(self, workers=None, queue_size=None, timeout=None, max_abandoned=None):
+        self.workers = workers or self.WORKERS
+        self.timeout = timeout or self.TIMEOUT
+        self.max_abandoned = self.MAX_ABANDONED if max_abandoned is None else max_abandoned
+
+        self._queue = Queue(maxsize=queue_size or self.QUEUE_SIZE)
+        self._lock = Lock()
+        self._busy = {}
+        self._abandoned = set()
+        # Количество зависших потоков, оставшихся без замены
+        self._missing = 0
+
+        self._submitted = 0
+        self._completed = 0
+        self._failed = 0
+        self._timed_out = 0
+        self._dropped = 0
+        self._max_queue_depth = 0
+        self._fire_lag = Histogram()
+        self._latency = {}
+
+        for _ in range(self.workers):
+            self._start_worker()
+
+        self._watchdog = Thread(target=self._watch)
+        self._watchdog.daemon = True
+        self._watchdog.start()
+
+    def submit(self, func, args=(), kwargs=None, task_id=None, deadline=None):
+        """
+        Ставит вызов функции в очередь без блокировки.
+
+        :param func: Функция, которую нужно вызвать.
+        :param args: Позиционные аргументы функции.
+        :param kwargs: Именованные аргументы функции.
+        :param task_id: ID задачи для сообщений об ошибках.
+        :param deadline: Назначенное время вызова в секундах Unix для
+                         учета опоздания.
+
+        :return: False, если очередь переполнена и вызов отброшен.
+        :rtype: bool
+        """
+        try:
+            self._queue.put_nowait((func, args, kwargs or {}, task_id, deadline))
+        except Full:
+            with self._lock:
+                self._dropped += 1
+            logger.warning("Очередь уведомлений переполнена, задание %s отброшено", task_id)
+            return False
+
+        depth = self._queue.qsize()
+        with self._lock:
+            self._submitted += 1
+            if depth > self._max_queue_depth:
+                self._max_queue_depth = depth
+        return True
+
+    def stats(self):
+        """
+        Возвращает счетчики работы пула.
+
+        :return: Словарь с глубиной очереди, количеством отправленных,
+                 выполненных, завершившихся ошибкой, зависших и отброшенных
+                 заданий, количеством выведенных из пула потоков,
+                 гистограммой опоздания срабатывания и
+                 гистограммами длительности вызова по функциям отправки.
+        :rtype: dict
+        """
+        with self._lock:
+            return {
+                "queue_depth": self._queue.qsize(),
+                "max_queue_depth": self._max_queue_depth,
+                "workers": self.workers,
+                "busy_workers": len(self._busy),
+                "abandoned_workers": len(self._abandoned),
+                "submitted": self._submitted,
+                "completed": self._completed,
+                "failed": self._failed,
+                "timed_out": self._timed_out,
+                "dropped": self._dropped,
+                "fire_lag": self._fire_lag.snapshot(),
+                "latency": {
+                    backend: histogram.snapshot()
+                    for backend, histogram in self._latency.items()
+                },
+            }
+
+    def _start_worker(self):
+        worker = Thread(target=self._work)
+        worker.daemon = True
+        worker.start()
+
+    def _work(self):
+        worker = current_thread()
+        while True:
+            func, args, kwargs, task_id, deadline = self._queue.get()
+            started = time.monotonic()
+            with self._lock:
+                self._busy[worker] = started
+                if deadline is not None:
+                    self._fire_lag.record(max(0.0, time.time() - deadline))
+
+            try:
+                func(*args, **kwargs)
+                failed = False
+            except Exception:
+                failed = True
+                logger.exception("Ошибка при отправке уведомления задачи %s", task_id)
+
+            duration = time.monotonic() - started
+            with self._lock:
+                # Выведенного из пула потока в _busy уже нет
+                self._busy.pop(worker, None)
+                if failed:
+                    self._failed += 1
+                else:
+                    self._completed += 1
+
+                # Гистограмма создается один раз на функцию отправки
+                backend = getattr(func, "__qualname__", None) or type(func).__name__
+                latency = self._latency.get(backend)
+                if latency is None:
+                    latency = self._latency[backend] = Histogram()
+                latency.record(duration)
+
+                # Поток, уже замененный сторожем, завершается, а
+                # оставшийся без замены возвращается в пул
+                if worker in self._abandoned:
+                    self._abandoned.discard(worker)
+                    if not self._missing:
+                        return
+                    self._missing -= 1
+
+    def _watch(self):
+        while True:
+            time.sleep(self.timeout / 2)
+            now = time.monotonic()
+
+            with self._lock:
+                hung = [
+                    worker for worker, started in self._busy.items()
+                    if now - started > self.timeout
+                ]
+                for worker in hung:
+                    del self._busy[worker]
+                    self._abandoned.add(worker)
+                    self._timed_out += 1
+                    if len(self._abandoned) > self.max_abandoned:
+                        self._missing += 1
+                        logger.error(
+                            "Уведомление выполняется дольше %.1f с, поток не заменен: "
+                            "уже выведено %d потоков",
+                            self.timeout, len(self._abandoned) - 1,
+                        )
+                        continue
+
+                    logger.warning(
+                        "Уведомление выполняется дольше %.1f с, поток заменен",
+                        self.timeout,
+                    )
+                    self._start_worker()
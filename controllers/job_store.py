@@ -0,0 +1,85 @@
+import atexit
+import logging
+import time
+from threading import Condition, Thread
+
+from database import write_scheduled_jobs
+
+logger = logging.getLogger(__name__)
+
+
+class JobStore:
+    """
+    Сохраняет задания планировщика в таблицу scheduled_jobs.
+
+    Изменения накапливаются в памяти и записываются отдельным потоком
+    одной транзакцией, поэтому серия планирований стоит одну запись в
+    базу данных, а поток планировщика не ждет ввода-вывода. Для каждой
+    задачи в буфере хранится только итоговое состояние: время следующего
+    срабатывания и время последнего срабатывания.
+    """
+
+    # Время в секундах, в течение которого изменения собираются в пачку
+    FLUSH_DELAY = 0.05
+
+    def __init__(self):
+        self._condition = Condition()
+        self._updated = {}
+        self._deleted = set()
+
+        self.thread = Thread(target=self.run_continuously)
+        self.thread.daemon = True
+        self.thread.start()
+
+        # Дописываем накопленные изменения при штатном завершении
+        atexit.register(self.flush)
+
+    def save(self, task_id, next_fire_time):
+        with self._condition:
+            self._deleted.discard(task_id)
+            fired_at = self._updated.get(task_id, (None, None))[1]
+            self._updated[task_id] = (next_fire_time, fired_at)
+            self._condition.notify()
+
+    def mark_fired(self, task_id, fired_at):
+        with self._condition:
+            self._deleted.discard(task_id)
+            self._updated[task_id] = (None, fired_at)
+            self._condition.notify()
+
+    def delete(self, task_id):
+        with self._condition:
+            self._updated.pop(task_id, None)
+            self._deleted.add(task_id)
+            self._condition.notify()
+
+    def run_continuously(self):
+        while True:
+            with self._condition:
+                while not (self._updated or self._deleted):
+                    self._condition.wait()
+
+            # Даем остальным изменениям серии попасть в ту же транзакцию
+            time.sleep(self.FLUSH_DELAY)
+            self.flush()
+
+    def flush(self):
+        """
+        Записывает накопленные изменения в базу данных одной транзакцией.
+        """
+        with self._condition:
+            updated, self._updated = self._updated, {}
+            deleted, self._deleted = self._deleted, set()
+
+        if not (updated or deleted):
+            return
+
+        result, error = write_scheduled_jobs(
+            updated=[
+                (task_id, next_fire_time, fired_at)
+                for task_id, (next_fire_time, fired_at) in updated.items()
+            ],
+            deleted=list(deleted),
+        )
+        if not result:
+            logger.error("Не удалось сохранить задания планировщика: %s", error)
@@ -0,0 +1,109 @@
+from bisect import bisect_left
+
+# Границы корзин гистограмм в секундах: от миллисекунды до минуты
+LATENCY_BUCKETS = (
+    0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5,
+    1.0, 2.5, 5.0, 10.0, 30.0, 60.0,
+)
+
+
+class Histogram:
+    """
+    Гистограмма с фиксированными корзинами.
+
+    Счетчики выделяются один раз при создании, поэтому запись значения
+    сводится к бинарному поиску корзины и увеличению счетчика без
+    выделения памяти. Гистограмма не потокобезопасна: запись должна
+    выполняться под блокировкой владельца или из одного потока.
+    """
+
+    __slots__ = ("bounds", "counts", "count", "total", "max")
+
+    def __init__(self, bounds=LATENCY_BUCKETS):
+        self.bounds = bounds
+        # Последняя корзина собирает значения больше последней границы
+        self.counts = [0] * (len(bounds) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def record(self, value):
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.count += 1
+        self.total += value
+        if value > self.max:
+            self.max = value
+
+    def quantile(self, q):
+        """
+        Оценивает квантиль по верхней границе корзины, в которую он попал.
+
+        :param q: Квантиль от 0 до 1.
+
+        :return: Оценка квантиля в секундах или None, если значений нет.
+        """
+        if not self.count:
+            return None
+
+        rank = q * self.count
+        seen = 0
+        for index, bucket_count in enumerate(self.counts):
+            seen += bucket_count
+            if seen >= rank:
+                return self.bounds[index] if index < len(self.bounds) else self.max
+        return self.max
+
+    def snapshot(self):
+        """
+        :return: Словарь с количеством значений, средним, максимумом,
+                 оценками p50, p95, p99 и счетчиками корзин.
+        :rtype: dict
+        """
+        return {
+            "count": self.count,
+            "mean": self.total / self.count if self.count else None,
+            "max": self.max,
+            "p50": self.quantile(0.5),
+            "p95": self.quantile(0.95),
+            "p99": self.quantile(0.99),
+            "buckets": dict(zip(self.bounds + (float("inf"),), self.counts)),
+        }
+
+
+class RateMeter:
+    """
+    Счетчик событий в секунду за скользящее окно.
+
+    Хранит кольцо из window посекундных счетчиков, выделенное один раз;
+    счетчик секунды обнуляется, когда кольцо доходит до него снова.
+    Как и Histogram, не потокобезопасен.
+    """
+
+    __slots__ = ("window", "counts", "seconds")
+
+    def __init__(self, window=60):
+        self.window = window
+        self.counts = [0] * window
+        self.seconds = [0] * window
+
+    def record(self, now, amount=1):
+        second = int(now)
+        slot = second % self.window
+        if self.seconds[slot] != second:
+            self.seconds[slot] = second
+            self.counts[slot] = 0
+        self.counts[slot] += amount
+
+    def rate(self, now):
+        """
+        :param now: Текущее время в секундах Unix.
+
+        :return: Среднее количество событий в секунду за окно.
+        :rtype: float
+        """
+        oldest = int(now) - self.window
+        total = sum(
+            count for count, second in zip(self.counts, self.seconds)
+            if second > oldest
+        )
+        return total / self.window
@@ -0,0 +1,185 @@
+import logging
+import time
+from collections import Counter
+from datetime import datetime
+
+from database import (
+    fetch_pending_reminders,
+    fetch_task_recurrence,
+    fetch_tasks,
+    refresh_task_recurrences,
+)
+from utils import send_notification, pluralize_word
+
+from .digest import NotificationDigest
+from .task_controller import TaskScheduler
+
+logger = logging.getLogger(__name__)
+
+REMINDER_TITLE = "Напоминание"
+DIGEST_TITLE = "Напоминания"
+NO_CATEGORY = "Без категории"
+
+# Сколько названий задач перечислять в сводном уведомлении
+SUMMARY_TASK_LIMIT = 3
+
+
+def notify_reminders(reminders):
+    """
+    Отправляет напоминания, сработавшие одной серией. Одно напоминание
+    отправляется как есть, несколько - одним уведомлением с количеством
+    задач по категориям.
+
+    :param reminders: Список кортежей (название задачи, название категории).
+    """
+    if len(reminders) == 1:
+        task_name, _ = reminders[0]
+        send_notification(REMINDER_TITLE, task_name)
+        return
+
+    categories = Counter(category_name or NO_CATEGORY for _, category_name in reminders)
+    count = len(reminders)
+    message = f"{count} {pluralize_word(word='задача', number=count)}: " + ", ".join(
+        f"{category_name} - {category_count}"
+        for category_name, category_count in categories.most_common()
+    )
+    send_notification(DIGEST_TITLE, message)
+
+
+def dispatch_notification(func, args):
+    """
+    Выполняет отправку уведомления в пуле планировщика, где она
+    ограничена по времени и учитывается в статистике.
+    """
+    TaskScheduler().dispatcher.submit(func, args)
+
+
+reminder_digest = NotificationDigest(notify_reminders, submit=dispatch_notification)
+
+
+def send_reminder(task_name, category_name=None):
+    """
+    Функция напоминания, которую выполняет планировщик. Уведомление не
+    отправляется сразу, а попадает в сводку reminder_digest, чтобы
+    напоминания с одним сроком не отправлялись по одному.
+
+    :param task_name: Название задачи.
+    :param category_name: Название категории задачи.
+    """
+    reminder_digest.add((task_name, category_name))
+
+
+def schedule_task_reminder(task_id, due_date, task_name, category_name=None, recurrence_rule=None):
+    """
+    Планирует напоминание задачи, заменяя прежнее.
+
+    :param task_id: ID задачи.
+    :param due_date: Срок задачи в виде объекта datetime.
+    :param task_name: Название задачи.
+    :param category_name: Название категории задачи.
+    :param recurrence_rule: Правило повторения задачи или None.
+    """
+    task_scheduler = TaskScheduler()
+    if recurrence_rule:
+        task_scheduler.schedule_recurring_task(
+            task_id,
+            due_date,
+            recurrence_rule.next_timestamp,
+            send_reminder,
+            task_name,
+            category_name,
+        )
+    else:
+        task_scheduler.schedule_task(
+            task_id,
+            due_date,
+            send_reminder,
+            task_name,
+            category_name,
+        )
+
+
+def reschedule_task_reminder(task_id):
+    """
+    Заново планирует напоминание задачи по ее сроку и правилу повторения
+    из базы данных, например, после переноса повторяющейся задачи на
+    следующее повторение.
+
+    :param task_id: ID задачи.
+    """
+    tasks = fetch_tasks(task_id=task_id, fields=("name", "due_date", "category"))
+    if not tasks:
+        return
+
+    task = tasks[0]
+    schedule_task_reminder(
+        task_id,
+        datetime.strptime(task.due_date, "%Y-%m-%d %H:%M:%S"),
+        task.name,
+        task.category,
+        fetch_task_recurrence(task_id),
+    )
+
+
+def notify_missed_reminders(jobs):
+    """
+    Отправляет одно сводное уведомление вместо серии пропущенных
+    напоминаний.
+
+    :param jobs: Список пропущенных заданий планировщика.
+    """
+    task_names = [
+        job.args[0] for job in jobs
+        if job.func is send_reminder and job.args
+    ]
+    count = len(jobs)
+
+    message = f"Пропущено {count} {pluralize_word(word='напоминание', number=count)}"
+    if task_names:
+        message += ": " + ", ".join(task_names[:SUMMARY_TASK_LIMIT])
+        if count > SUMMARY_TASK_LIMIT:
+            message += f" и еще {count - SUMMARY_TASK_LIMIT}"
+
+    send_notification(REMINDER_TITLE, message)
+
+
+def restore_reminders():
+    """
+    Восстанавливает напоминания незавершенных задач после перезапуска
+    приложения. Задачи читаются из базы данных одним потоковым запросом и
+    добавляются в планировщик пачкой. Пропущенные за время простоя
+    напоминания объединяются планировщиком в одно сводное уведомление.
+    Перед этим пересчитываются даты повторений, которые планировщик не
+    обновлял, пока приложение было закрыто.
+
+    :return: Количество восстановленных напоминаний.
+    :rtype: int
+    """
+    started = time.perf_counter()
+
+    result, error = refresh_task_recurrences()
+    if not result:
+        logger.error("Не удалось пересчитать даты повторений: %s", error)
+
+    task_scheduler = TaskScheduler()
+    task_scheduler.configure(summary_callback=notify_missed_reminders)
+
+    restored = task_scheduler.schedule_tasks(
+        (
+            (
+                task_id,
+                deadline,
+                send_reminder,
+                (task_name, category_name),
+                rule.next_timestamp if rule else None,
+            )
+            for task_id, task_name, category_name, deadline, rule in fetch_pending_reminders()
+        ),
+        persist=False,
+    )
+
+    logger.info(
+        "Восстановлено напоминаний: %d за %.3f с",
+        restored, time.perf_counter() - started,
+    )
+    return restored
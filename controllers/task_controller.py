@@ -1,32 +1,519 @@
-import schedule
+import logging
 import time
-from datetime import datetime
-from threading import Thread
+from queue import Empty, SimpleQueue
+from threading import Lock, Thread
+
+from .dispatcher import NotificationDispatcher
+from .job_store import JobStore
+from .metrics import RateMeter
+from .timers import HeapTimerQueue, TimingWheel
+
+logger = logging.getLogger(__name__)
+
+
+class ScheduledJob:
+    """
+    Запланированное задание. Хранится в структуре таймеров планировщика
+    и в индексе по task_id. Поля slot и level принадлежат структуре
+    таймеров, а cancelled позволяет куче удалять отмененные задания лениво.
+
+    Для повторяющегося задания recurrence - функция, которая по времени
+    срабатывания в секундах Unix возвращает время следующего срабатывания
+    или None.
+
+    Служебное задание (service) не относится к задаче: оно не сохраняется
+    в базу данных, выполняется даже после пропущенного срока и в отдельном
+    пуле, чтобы долгое обслуживание не задерживало уведомления.
+    """
+
+    __slots__ = (
+        "deadline", "task_id", "func", "args", "kwargs", "recurrence",
+        "service", "cancelled", "slot", "level",
+    )
+
+    def __init__(self, deadline, task_id, func, args, kwargs, recurrence=None, service=False):
+        self.deadline = deadline
+        self.task_id = task_id
+        self.func = func
+        self.args = args
+        self.kwargs = kwargs
+        self.recurrence = recurrence
+        self.service = service
+        self.cancelled = False
+        self.slot = None
+        self.level = None
+
 
 class TaskScheduler:
+    """
+    Планировщик напоминаний на основе структуры таймеров с абсолютными
+    сроками: мин-кучи (HeapTimerQueue) или, для очень большого числа
+    напоминаний, иерархического колеса таймеров (TimingWheel). Структура
+    выбирается настройкой TIMER_BACKEND до создания планировщика.
+
+    Структурой таймеров и индексом заданий по task_id владеет только поток
+    планировщика. Методы schedule_* и clear_* из любых потоков (например,
+    обработчиков событий Flet) лишь кладут команды в очередь, а поток
+    планировщика спит на ней до ближайшего срока, просыпается при
+    появлении команд и применяет их пачкой. Поэтому изменения не требуют
+    общей блокировки и не гоняются с обработкой сработавших заданий.
+
+    Для каждой задачи хранится не больше одного задания, поэтому отмена и
+    перенос напоминания выполняются через индекс по task_id. Сами задания
+    выполняются в пуле NotificationDispatcher, поэтому поток планировщика
+    только ставит их в очередь и не ждет ввода-вывода.
+
+    У повторяющегося задания в планировщике только ближайшее срабатывание:
+    следующее вычисляется в момент, когда срабатывает текущее.
+
+    Задания сохраняются в базу данных через JobStore. Задания, опоздавшие
+    больше чем на misfire_grace_time секунд (после перезапуска или сна
+    компьютера), объединяются по политике misfire_policy:
+
+    - MISFIRE_ALL - выполнить все пропущенные задания;
+    - MISFIRE_LATEST - выполнить только самое позднее из них;
+    - MISFIRE_SUMMARY - передать их все одной функции summary_callback
+      (например, для одного сводного уведомления).
+    """
+
+    MISFIRE_ALL = "all"
+    MISFIRE_LATEST = "latest"
+    MISFIRE_SUMMARY = "summary"
+
+    # Максимальная длительность одного ожидания в секундах. Сроки задаются
+    # по системным часам, поэтому их перевод (например, после сна ноутбука)
+    # замечается не позже, чем через это время.
+    MAX_WAIT = 30.0
+
+    # Сколько команд применяется за одно пробуждение, чтобы поток команд
+    # не задерживал срабатывание заданий
+    COMMAND_BATCH = 10000
+
+    TIMER_BACKENDS = {
+        "heap": HeapTimerQueue,
+        "wheel": TimingWheel,
+    }
+    TIMER_BACKEND = "heap"
+
+    # Значения по умолчанию для настроек пропущенных срабатываний
+    MISFIRE_POLICY = MISFIRE_SUMMARY
+    MISFIRE_GRACE_TIME = 60.0
+
+    # Настройки пула потоков, выполняющих задания
+    DISPATCH_WORKERS = 2
+    DISPATCH_QUEUE_SIZE = 1024
+    DISPATCH_TIMEOUT = 10.0
+
+    # Настройки пула, выполняющего служебные задания
+    SERVICE_WORKERS = 1
+    SERVICE_QUEUE_SIZE = 16
+    SERVICE_TIMEOUT = 60.0
+
+    # Период в секундах, с которым статистика пишется в журнал.
+    # None отключает запись
+    STATS_LOG_INTERVAL = None
+
     _instance = None
+    _instance_lock = Lock()
 
     def __new__(cls, *args, **kwargs):
-        if cls._instance is None:
-            cls._instance = super().__new__(cls)
-            cls._instance.scheduler = schedule.Scheduler()
-            cls._instance.thread = Thread(target=cls._instance.run_continuously)
-            cls._instance.thread.daemon = True
-            cls._instance.thread.start()
+        if cls._instance is not None:
+            return cls._instance
+
+        with cls._instance_lock:
+            if cls._instance is None:
+                cls._instance = cls._create_instance()
         return cls._instance
 
+    @classmethod
+    def _create_instance(cls):
+        instance = super().__new__(cls)
+        instance._timers = cls.TIMER_BACKENDS[cls.TIMER_BACKEND](now=time.time())
+        instance._jobs = {}
+        instance._commands = SimpleQueue()
+        instance._store = JobStore()
+        instance.dispatcher = NotificationDispatcher(
+            workers=cls.DISPATCH_WORKERS,
+            queue_size=cls.DISPATCH_QUEUE_SIZE,
+            timeout=cls.DISPATCH_TIMEOUT,
+        )
+        instance.service_dispatcher = NotificationDispatcher(
+            workers=cls.SERVICE_WORKERS,
+            queue_size=cls.SERVICE_QUEUE_SIZE,
+            timeout=cls.SERVICE_TIMEOUT,
+        )
+        instance.misfire_policy = cls.MISFIRE_POLICY
+        instance.misfire_grace_time = cls.MISFIRE_GRACE_TIME
+        instance.summary_callback = None
+        instance._fired_total = 0
+        instance._fired_rate = RateMeter()
+        instance.thread = Thread(target=instance.run_continuously)
+        instance.thread.daemon = True
+        instance.thread.start()
+
+        if cls.STATS_LOG_INTERVAL:
+            instance.start_stats_logging(cls.STATS_LOG_INTERVAL)
+        return instance
+
+    def configure(
+            self,
+            misfire_policy=None,
+            misfire_grace_time=None,
+            summary_callback=None
+    ):
+        """
+        Изменяет настройки обработки пропущенных срабатываний.
+
+        :param misfire_policy: Одна из политик MISFIRE_ALL, MISFIRE_LATEST,
+                               MISFIRE_SUMMARY.
+        :param misfire_grace_time: Опоздание в секундах, после которого
+                                   срабатывание считается пропущенным.
+        :param summary_callback: Функция, принимающая список пропущенных
+                                 заданий, для политики MISFIRE_SUMMARY.
+        """
+        if misfire_policy is not None:
+            if misfire_policy not in (
+                    self.MISFIRE_ALL, self.MISFIRE_LATEST, self.MISFIRE_SUMMARY
+            ):
+                raise ValueError(f"Неизвестная политика: {misfire_policy}")
+            self.misfire_policy = misfire_policy
+        if misfire_grace_time is not None:
+            self.misfire_grace_time = misfire_grace_time
+        if summary_callback is not None:
+            self.summary_callback = summary_callback
+
     def run_continuously(self):
         while True:
-            self.scheduler.run_pending()
-            time.sleep(1)
+            try:
+                self._run_due_jobs()
+            except Exception:
+                logger.exception("Ошибка в потоке планировщика")
+
+    def _run_due_jobs(self):
+        due_jobs = self._wait_for_due_jobs()
+
+        now = time.time()
+        missed_jobs = []
+        for job in due_jobs:
+            if not job.service and now - job.deadline > self.misfire_grace_time:
+                missed_jobs.append(job)
+            else:
+                self._run_job(job)
+
+        if missed_jobs:
+            self._run_missed_jobs(missed_jobs)
+
+    def _run_job(self, job):
+        dispatcher = self.service_dispatcher if job.service else self.dispatcher
+        dispatcher.submit(
+            job.func, job.args, job.kwargs, job.task_id, job.deadline,
+        )
+
+    def _run_missed_jobs(self, missed_jobs):
+        """
+        Выполняет пропущенные задания согласно политике misfire_policy.
+
+        :param missed_jobs: Список пропущенных заданий в порядке их сроков.
+        """
+        if self.misfire_policy == self.MISFIRE_ALL:
+            for job in missed_jobs:
+                self._run_job(job)
+
+        elif (
+                self.misfire_policy == self.MISFIRE_SUMMARY
+                and self.summary_callback is not None
+                and len(missed_jobs) > 1
+        ):
+            self.dispatcher.submit(self.summary_callback, (missed_jobs,))
+
+        else:
+            self._run_job(max(missed_jobs, key=lambda job: job.deadline))
+
+    def _wait_for_due_jobs(self):
+        """
+        Применяет поступающие команды и ожидает наступления ближайшего
+        срока, после чего извлекает из структуры таймеров все задания,
+        срок которых уже наступил.
+
+        :return: Список заданий, готовых к выполнению.
+        """
+        timeout = 0
+        while True:
+            self._apply_commands(timeout)
+
+            now = time.time()
+            due_jobs = self._timers.pop_due(now)
+            if due_jobs:
+                for job in due_jobs:
+                    del self._jobs[job.task_id]
+                    self._fired_total += 1
+                    self._fired_rate.record(now)
+                    if not job.service:
+                        self._store.mark_fired(job.task_id, now)
+                    self._schedule_next_occurrence(job, now)
+                return due_jobs
+
+            deadline = self._timers.next_deadline()
+            if deadline is None:
+                timeout = None
+            else:
+                timeout = min(max(deadline - now, 0), self.MAX_WAIT)
+
+    def _apply_commands(self, timeout):
+        """
+        Ждет первую команду не дольше timeout секунд (None - без
+        ограничения, 0 - не ждет) и применяет ее вместе со всеми уже
+        накопившимися, но не больше COMMAND_BATCH за раз.
+        """
+        try:
+            if timeout == 0:
+                command = self._commands.get_nowait()
+            else:
+                command = self._commands.get(timeout=timeout)
+        except Empty:
+            return
+
+        # Оставшиеся сверх пачки команды применятся на следующем проходе:
+        # очередь не пуста, поэтому ожидания не будет
+        for _ in range(self.COMMAND_BATCH - 1):
+            self._apply_command(command)
+            try:
+                command = self._commands.get_nowait()
+            except Empty:
+                return
+        self._apply_command(command)
+
+    @staticmethod
+    def _apply_command(command):
+        # Ошибка одной команды не должна останавливать поток планировщика:
+        # кроме него структурой таймеров никто не владеет
+        handler, argument = command
+        try:
+            handler(argument)
+        except Exception:
+            logger.exception("Ошибка команды планировщика %s", getattr(handler, "__name__", handler))
+
+    def _schedule_next_occurrence(self, job, now):
+        # Повторяющееся задание сразу заменяется следующим срабатыванием.
+        # Пропущенные повторения не догоняются: следующее ищется после now.
+        if job.recurrence is None:
+            return
+
+        try:
+            deadline = job.recurrence(max(now, job.deadline))
+        except Exception:
+            logger.exception("Ошибка вычисления следующего срабатывания задания %s", job.task_id)
+            return
+        if deadline is not None:
+            self._push(ScheduledJob(
+                deadline, job.task_id, job.func, job.args, job.kwargs, job.recurrence, job.service,
+            ))
+
+    def _push(self, job):
+        """
+        Добавляет задание в структуру таймеров и индекс, заменяя прежнее
+        задание той же задачи, и сохраняет его. Выполняется в потоке
+        планировщика.
+        """
+        self._cancel(job.task_id)
+        self._jobs[job.task_id] = job
+        if not job.service:
+            self._store.save(job.task_id, job.deadline)
+        self._timers.push(job)
+
+    def _push_many(self, command):
+        jobs, persist = command
+        if not persist:
+            # Задания загружены из базы данных, пока пользователь мог
+            # запланировать или изменить напоминание задачи. Уже
+            # запланированное задание новее загруженного и не заменяется
+            jobs = [job for job in jobs if job.task_id not in self._jobs]
+        for job in jobs:
+            self._cancel(job.task_id)
+            self._jobs[job.task_id] = job
+            if persist:
+                self._store.save(job.task_id, job.deadline)
+        # Задания, замененные внутри той же пачки, уже отменены
+        self._timers.extend([job for job in jobs if not job.cancelled])
+
+    def _cancel(self, task_id):
+        job = self._jobs.pop(task_id, None)
+        if job is not None:
+            job.cancelled = True
+            self._timers.cancel(job)
+
+    def _cancel_many(self, task_ids):
+        for task_id in task_ids:
+            self._cancel(task_id)
+            self._store.delete(task_id)
+
+    def _cancel_and_delete(self, task_id):
+        self._cancel(task_id)
+        self._store.delete(task_id)
 
     def schedule_task(self, task_id, date_time, func, *args, **kwargs):
-        delay = (date_time - datetime.now()).total_seconds()
-        if delay > 0:
-            def job_that_deletes_itself():
-                func(*args, **kwargs)
-                return schedule.CancelJob
-            self.scheduler.every(delay).seconds.do(job_that_deletes_itself).tag(task_id)
+        """
+        Планирует выполнение функции в указанное время. Ранее
+        запланированное задание той же задачи заменяется.
+
+        :param task_id: ID задачи, к которой относится задание.
+        :param date_time: Время выполнения в виде объекта datetime.
+        :param func: Функция, которую нужно вызвать.
+        """
+        deadline = date_time.timestamp()
+        if deadline > time.time():
+            self._commands.put((self._push, ScheduledJob(deadline, task_id, func, args, kwargs)))
+
+    def schedule_recurring_task(self, task_id, date_time, recurrence, func, *args, **kwargs):
+        """
+        Планирует повторяющееся выполнение функции. В планировщике хранится
+        только ближайшее срабатывание, следующее вычисляется, когда оно
+        наступит. Ранее запланированное задание той же задачи заменяется.
+
+        :param task_id: ID задачи, к которой относится задание.
+        :param date_time: Время первого срабатывания в виде объекта datetime.
+        :param recurrence: Функция, возвращающая по времени срабатывания
+                           в секундах Unix время следующего или None,
+                           например, RecurrenceRule.next_timestamp.
+        :param func: Функция, которую нужно вызвать.
+        """
+        deadline = date_time.timestamp()
+        if deadline <= time.time():
+            deadline = recurrence(time.time())
+        if deadline is not None:
+            self._commands.put((
+                self._push,
+                ScheduledJob(deadline, task_id, func, args, kwargs, recurrence),
+            ))
+
+    def schedule_service_job(self, job_id, interval, func, *args, delay=None, **kwargs):
+        """
+        Планирует служебное задание, которое выполняется раз в interval
+        секунд, например, обслуживание базы данных. Задание не сохраняется
+        в базу данных, поэтому после перезапуска его нужно запланировать
+        снова, а пропущенное срабатывание выполняется один раз, без сводки.
+
+        :param job_id: ID задания. Должен быть отрицательным, чтобы не
+                       совпасть с ID задач.
+        :param interval: Период выполнения в секундах.
+        :param func: Функция, которую нужно вызвать.
+        :param delay: Задержка первого выполнения в секундах.
+                      По умолчанию равна interval.
+        """
+        deadline = time.time() + (interval if delay is None else delay)
+        self._commands.put((
+            self._push,
+            ScheduledJob(
+                deadline, job_id, func, args, kwargs,
+                lambda timestamp: timestamp + interval,
+                service=True,
+            ),
+        ))
+
+    def schedule_tasks(self, jobs, persist=True):
+        """
+        Планирует множество заданий за один вызов. Куча в этом случае
+        перестраивается один раз за O(n) вместо n вставок по O(log n).
+
+        :param jobs: Итерируемый объект с кортежами
+                     (task_id, timestamp, func, args, recurrence), где
+                     timestamp - время выполнения в секундах Unix, а
+                     recurrence - функция следующего срабатывания или None.
+                     Задания с прошедшим сроком выполняются сразу с учетом
+                     политики пропущенных срабатываний.
+        :param persist: Если False, задания не записываются в базу данных
+                        (например, когда они только что из нее загружены), а
+                        задачи, у которых уже есть запланированное задание,
+                        пропускаются, чтобы не заменить более новое.
+
+        :return: Количество запланированных заданий.
+        :rtype: int
+        """
+        # Задание без времени срабатывания (например, со сроком, который
+        # не удалось перевести в секунды) нельзя сравнить с остальными
+        new_jobs = []
+        for task_id, deadline, func, args, recurrence in jobs:
+            if deadline is None:
+                logger.warning("Задание %s без времени срабатывания пропущено", task_id)
+                continue
+            new_jobs.append(ScheduledJob(deadline, task_id, func, args, {}, recurrence))
+        if not new_jobs:
+            return 0
+
+        self._commands.put((self._push_many, (new_jobs, persist)))
+        return len(new_jobs)
 
     def clear_scheduled_task(self, task_id):
-        self.scheduler.clear(task_id)
\ No newline at end of file
+        """
+        Отменяет запланированное задание задачи за O(1) (для кучи -
+        амортизированно).
+
+        :param task_id: ID задачи, напоминание которой нужно отменить.
+        """
+        self._commands.put((self._cancel_and_delete, task_id))
+
+    def clear_scheduled_tasks(self, task_ids):
+        """
+        Отменяет запланированные задания нескольких задач за один вызов.
+
+        :param task_ids: Итерируемый объект с ID задач.
+        """
+        self._commands.put((self._cancel_many, list(task_ids)))
+
+    def stats(self):
+        """
+        Возвращает статистику работы планировщика.
+
+        :return: Словарь с количеством ожидающих заданий, выбранной
+                 структурой таймеров и ее размером (для кучи - включая еще
+                 не удаленные отмененные записи), количеством
+                 сработавших заданий всего и в секунду за последнюю минуту,
+                 а также статистикой пула уведомлений в ключе "dispatch":
+                 глубиной очереди, гистограммой опоздания срабатывания
+                 "fire_lag" и длительностью отправки по функциям "latency",
+                 а также такой же статистикой пула служебных заданий в
+                 ключе "service".
+        :rtype: dict
+        """
+        # Значения читаются без синхронизации с потоком планировщика и
+        # могут отставать на несколько команд
+        stats = {
+            "pending_jobs": len(self._jobs),
+            "pending_commands": self._commands.qsize(),
+            "timer_backend": self.TIMER_BACKEND,
+            "timer_size": len(self._timers),
+            "fired_total": self._fired_total,
+            "fired_per_second": self._fired_rate.rate(time.time()),
+        }
+        stats["dispatch"] = self.dispatcher.stats()
+        stats["service"] = self.service_dispatcher.stats()
+        return stats
+
+    def start_stats_logging(self, interval=60.0):
+        """
+        Запускает поток, который раз в interval секунд пишет краткую
+        статистику планировщика в журнал.
+
+        :param interval: Период записи в секундах.
+        """
+        def log_stats():
+            while True:
+                time.sleep(interval)
+                stats = self.stats()
+                dispatch = stats["dispatch"]
+                fire_lag = dispatch["fire_lag"]
+                logger.info(
+                    "Планировщик: ожидают %d, сработало %.2f/с, "
+                    "опоздание p50=%s p99=%s max=%.3f с, очередь %d, отброшено %d",
+                    stats["pending_jobs"],
+                    stats["fired_per_second"],
+                    fire_lag["p50"],
+                    fire_lag["p99"],
+                    fire_lag["max"],
+                    dispatch["queue_depth"],
+                    dispatch["dropped"],
+                )
+
+        thread = Thread(target=log_stats)
+        thread.daemon = True
+        thread.start()
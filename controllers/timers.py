@@ -0,0 +1,236 @@
+import heapq
+import itertools
+
+
+class HeapTimerQueue:
+    """
+    Очередь таймеров на мин-куче абсолютных сроков.
+
+    Вставка стоит O(log n). Отмена только помечает задание, а из кучи оно
+    удаляется лениво: при извлечении или при перестройке кучи, когда
+    отмененные записи составляют больше половины ее размера.
+    """
+
+    # Куча перестраивается не раньше, чем наберется столько отмененных записей
+    COMPACT_THRESHOLD = 1024
+
+    def __init__(self, now=None):
+        self._heap = []
+        self._sequence = itertools.count()
+        self._cancelled_count = 0
+
+    def __len__(self):
+        return len(self._heap)
+
+    def push(self, job):
+        heapq.heappush(self._heap, (job.deadline, next(self._sequence), job))
+
+    def extend(self, jobs):
+        entries = [(job.deadline, next(self._sequence), job) for job in jobs]
+        if len(entries) * 4 >= len(self._heap):
+            self._heap.extend(entries)
+            heapq.heapify(self._heap)
+        else:
+            for entry in entries:
+                heapq.heappush(self._heap, entry)
+
+    def cancel(self, job):
+        # Задание уже помечено как отмененное, остается учесть его
+        self._cancelled_count += 1
+        if (
+            self._cancelled_count >= self.COMPACT_THRESHOLD
+            and self._cancelled_count * 2 > len(self._heap)
+        ):
+            self._heap = [entry for entry in self._heap if not entry[2].cancelled]
+            heapq.heapify(self._heap)
+            self._cancelled_count = 0
+
+    def next_deadline(self):
+        # Снимаем с вершины кучи отмененные задания, чтобы не просыпаться
+        # ради них
+        while self._heap and self._heap[0][2].cancelled:
+            heapq.heappop(self._heap)
+            self._cancelled_count -= 1
+        return self._heap[0][0] if self._heap else None
+
+    def pop_due(self, now):
+        due_jobs = []
+        while self._heap and self._heap[0][0] <= now:
+            job = heapq.heappop(self._heap)[2]
+            if job.cancelled:
+                self._cancelled_count -= 1
+                continue
+            due_jobs.append(job)
+        return due_jobs
+
+
+class TimingWheel:
+    """
+    Иерархическое колесо таймеров с уровнями секунд, минут, часов и дней.
+
+    Каждый уровень - кольцо слотов-множеств. Задание кладется на самый
+    нижний уровень, в пределах которого лежит его срок: в секундный слот,
+    если срок в текущей минуте, в минутный - если в текущем часе, и так
+    далее. Сроки дальше дневного уровня хранятся в отдельном списке.
+    Вставка и отмена стоят O(1). При переходе через границу минуты (часа,
+    дня) задания соответствующего слота верхнего уровня раскладываются
+    ниже, поэтому каждое задание перекладывается не больше четырех раз, а
+    продвижение колеса стоит амортизированно O(1). Пустые участки колеса
+    пропускаются целиком.
+    """
+
+    UNITS = (1, 60, 3600, 86400)
+
+    def __init__(self, now=None, days=64):
+        """
+        :param now: Текущее время в секундах Unix, от которого отсчитывается
+                    колесо. По умолчанию берется из первого задания.
+        :param days: Количество слотов дневного уровня.
+        """
+        self._sizes = (60, 60, 24, days)
+        self._levels = [[set() for _ in range(size)] for size in self._sizes]
+        self._level_counts = [0, 0, 0, 0]
+        self._overflow = set()
+        self._current = int(now) if now is not None else None
+        self._count = 0
+
+    def __len__(self):
+        return self._count
+
+    def push(self, job):
+        if self._current is None:
+            self._current = int(job.deadline)
+        self._place(job)
+        self._count += 1
+
+    def extend(self, jobs):
+        for job in jobs:
+            self.push(job)
+
+    def cancel(self, job):
+        if job.slot is None:
+            return
+        job.slot.discard(job)
+        if job.level is not None:
+            self._level_counts[job.level] -= 1
+        job.slot = None
+        self._count -= 1
+
+    def next_deadline(self):
+        if not self._count:
+            return None
+
+        current = self._current
+        level0, level1, level2, level3 = self._levels
+
+        if self._level_counts[0]:
+            for second in range(current % 60, 60):
+                slot = level0[second]
+                if slot:
+                    return min(job.deadline for job in slot)
+
+        # На верхних уровнях достаточно проснуться на границе ближайшего
+        # непустого слота: там задания разложатся ниже
+        if self._level_counts[1]:
+            for minute in range(current // 60 % 60 + 1, 60):
+                if level1[minute]:
+                    return current // 3600 * 3600 + minute * 60
+
+        if self._level_counts[2]:
+            for hour in range(current // 3600 % 24 + 1, 24):
+                if level2[hour]:
+                    return current // 86400 * 86400 + hour * 3600
+
+        today = current // 86400
+        if self._level_counts[3]:
+            days = self._sizes[3]
+            for offset in range(1, days):
+                if level3[(today + offset) % days]:
+                    return (today + offset) * 86400
+
+        return (today + 1) * 86400
+
+    def pop_due(self, now):
+        due_jobs = []
+        if self._current is None:
+            return due_jobs
+
+        target = int(now)
+        level0 = self._levels[0]
+
+        while True:
+            slot = level0[self._current % 60]
+            if slot:
+                if self._current < target:
+                    ready = list(slot)
+                else:
+                    ready = [job for job in slot if job.deadline <= now]
+                for job in ready:
+                    self.cancel(job)
+                due_jobs.extend(ready)
+
+            if self._current >= target:
+                return due_jobs
+            self._advance(target)
+
+    def _advance(self, target):
+        """
+        Сдвигает колесо на следующую секунду или, если нижние уровни пусты,
+        сразу к ближайшей границе, на которой нужно раскладывать задания.
+        """
+        current = self._current
+        if not self._count:
+            self._current = target
+            return
+
+        # Прыжок на последнюю секунду перед границей пустого участка
+        if not self._level_counts[0]:
+            boundary = current // 60 * 60 + 60
+            if not self._level_counts[1]:
+                boundary = current // 3600 * 3600 + 3600
+                if not self._level_counts[2]:
+                    boundary = current // 86400 * 86400 + 86400
+            current = max(current, min(target, boundary) - 1)
+
+        current += 1
+        self._current = current
+
+        if current % 86400 == 0:
+            days = self._sizes[3]
+            self._cascade(self._levels[3][current // 86400 % days])
+            overflow, self._overflow = self._overflow, set()
+            self._cascade(overflow)
+        if current % 3600 == 0:
+            self._cascade(self._levels[2][current // 3600 % 24])
+        if current % 60 == 0:
+            self._cascade(self._levels[1][current // 60 % 60])
+
+    def _cascade(self, slot):
+        jobs = list(slot)
+        for job in jobs:
+            self.cancel(job)
+            self.push(job)
+
+    def _place(self, job):
+        current = self._current
+        second = max(int(job.deadline), current)
+
+        if second // 60 == current // 60:
+            level, index = 0, second % 60
+        elif second // 3600 == current // 3600:
+            level, index = 1, second // 60 % 60
+        elif second // 86400 == current // 86400:
+            level, index = 2, second // 3600 % 24
+        elif second // 86400 - current // 86400 < self._sizes[3]:
+            level, index = 3, second // 86400 % self._sizes[3]
+        else:
+            job.slot = self._overflow
+            job.level = None
+            self._overflow.add(job)
+            return
+
+        slot = self._levels[level][index]
+        slot.add(job)
+        job.slot = slot
+        job.level = level
+        self._level_counts[level] += 1
@@ -1,28 +1,79 @@
 from .functions import (
     setup_database,
     fetch_categories,
+    fetch_category_summaries,
+    fetch_category_task_ids,
+    fetch_category_names,
     change_task_status,
+    complete_task,
     delete_category,
     update_category,
     fetch_statuses,
+    fetch_pending_reminders,
+    write_scheduled_jobs,
+    set_task_recurrence,
+    refresh_task_recurrences,
+    fetch_task_recurrence,
     add_category,
     fetch_tasks,
+    fetch_tasks_page,
+    search_tasks,
+    iter_tasks,
+    iter_categories,
     update_task,
     delete_task,
     add_task,
-
+    add_tasks_bulk,
+    change_task_status_bulk,
+    delete_tasks_bulk,
+    update_tasks_bulk,
+    archive_completed_tasks,
+    reactivate_recurring_tasks,
+    TASK_PAGE_SIZE,
+    TASK_LIST_FIELDS,
 )
+from .cache import query_cache
+from .recurrence import RecurrenceRule
+from .records import Category, Task
+from .write_behind import WriteBehindQueue, write_behind
 
 __all__ = [
     'setup_database',
     'fetch_categories',
+    'fetch_category_summaries',
+    'fetch_category_task_ids',
+    'fetch_category_names',
     'change_task_status',
+    'complete_task',
     'delete_category',
     'update_category',
     'fetch_statuses',
+    'fetch_pending_reminders',
+    'write_scheduled_jobs',
+    'set_task_recurrence',
+    'refresh_task_recurrences',
+    'fetch_task_recurrence',
+    'RecurrenceRule',
+    'query_cache',
+    'Category',
+    'Task',
+    'WriteBehindQueue',
+    'write_behind',
     'add_category',
     'fetch_tasks',
+    'fetch_tasks_page',
+    'search_tasks',
+    'iter_tasks',
+    'iter_categories',
     'update_task',
     'delete_task',
     'add_task',
+    'add_tasks_bulk',
+    'change_task_status_bulk',
+    'delete_tasks_bulk',
+    'update_tasks_bulk',
+    'archive_completed_tasks',
+    'reactivate_recurring_tasks',
+    'TASK_PAGE_SIZE',
+    'TASK_LIST_FIELDS',
 ]
\ No newline at end of file
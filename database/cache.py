@@ -0,0 +1,210 @@
+import functools
+import inspect
+from collections import OrderedDict
+from threading import Lock
+from typing import Callable, Dict, List, Optional
+
+from .connection import connection, connection_manager
+
+
+class ReferenceCache:
+    """
+    Кэш справочников: статусов и категорий.
+
+    Справочники читаются из базы данных целиком при первом обращении, после
+    чего поиск ID по названию выполняется по словарю без запросов к базе
+    данных. Функции, изменяющие категории или статусы, сбрасывают кэш, и
+    при следующем обращении он загружается заново.
+
+    Загруженные данные хранятся одним кортежем и заменяются целиком,
+    поэтому читатели из разных потоков не видят частично обновленный кэш.
+    """
+
+    def __init__(self):
+        self._lock = Lock()
+        self._data = None
+        self._generation = 0
+
+    def status_id(self, name: str) -> Optional[int]:
+        return self._get()[0].get(name)
+
+    def category_id(self, name: str) -> Optional[int]:
+        return self._get()[1].get(name)
+
+    def status_ids(self) -> Dict[str, int]:
+        return self._get()[0]
+
+    def category_ids(self) -> Dict[str, int]:
+        return self._get()[1]
+
+    def default_status_id(self) -> Optional[int]:
+        """
+        :return: ID статуса, назначаемого новым задачам, - первого по порядку.
+        """
+        return self._get()[2]
+
+    def status_names(self) -> List[str]:
+        return list(self._get()[0])
+
+    def category_names(self) -> List[str]:
+        return list(self._get()[1])
+
+    def invalidate(self):
+        """
+        Сбрасывает кэш. Вызывается после изменения статусов или категорий.
+        """
+        with self._lock:
+            self._generation += 1
+            self._data = None
+
+    def _get(self):
+        data = self._data
+        if data is None:
+            data = self._load()
+        return data
+
+    def _load(self):
+        with self._lock:
+            generation = self._generation
+
+        with connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("SELECT name, id FROM statuses ORDER BY id")
+            statuses = dict(cursor.fetchall())
+            cursor.execute("SELECT name, id FROM categories ORDER BY id")
+            categories = dict(cursor.fetchall())
+
+        data = (statuses, categories, next(iter(statuses.values()), None))
+        with self._lock:
+            # Если кэш сбросили во время загрузки, данные могли устареть
+            if generation == self._generation:
+                self._data = data
+        return data
+
+
+reference_cache = ReferenceCache()
+
+
+class QueryCache:
+    """
+    Кэш результатов функций выборки с ключом по функции и аргументам.
+
+    Каждый результат хранится вместе с версией данных - парой из счетчика
+    зафиксированных приложением изменений (connection_manager.write_count)
+    и значения PRAGMA data_version отдельного соединения, которое меняется
+    после фиксации изменений любым другим соединением, в том числе другим
+    процессом. Если при обращении версия отличается, весь кэш сбрасывается,
+    поэтому проверка актуальности стоит один PRAGMA без разбора того,
+    какие таблицы изменились.
+
+    Количество результатов ограничено max_size, при переполнении
+    вытесняется давно не использовавшийся. Результаты возвращаются
+    вызывающему коду без копирования, поэтому изменять их нельзя.
+    """
+
+    # Наибольшее количество хранимых результатов
+    MAX_SIZE = 256
+
+    # Название соединения для чтения PRAGMA data_version
+    CONNECTION_NAME = "query_cache"
+
+    def __init__(self, max_size: Optional[int] = None):
+        """
+        :param max_size: Наибольшее количество хранимых результатов.
+        """
+        self.max_size = max_size or self.MAX_SIZE
+
+        self._lock = Lock()
+        self._entries = OrderedDict()
+        self._version = None
+
+        self.hits = 0
+        self.misses = 0
+
+    def cached(self, func: Optional[Callable] = None, *, normalize: Optional[Callable] = None):
+        """
+        Декоратор, кэширующий результаты функции выборки.
+
+        Аргументы приводятся к полному набору именованных со значениями по
+        умолчанию, поэтому fetch_tasks() и fetch_tasks(include_completed=True)
+        используют один результат. Функция normalize получает словарь
+        аргументов и может заменить в нем значения, зависящие от текущего
+        времени, например, None на сегодняшнюю дату, - с ними же вызывается
+        и сама функция.
+
+        :param func: Кэшируемая функция.
+        :param normalize: Функция приведения аргументов.
+        """
+        if func is None:
+            return functools.partial(self.cached, normalize=normalize)
+
+        signature = inspect.signature(func)
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            bound = signature.bind(*args, **kwargs)
+            bound.apply_defaults()
+            arguments = bound.arguments
+            if normalize is not None:
+                normalize(arguments)
+
+            key = (func.__qualname__, tuple(arguments.items()))
+            try:
+                hash(key)
+            except TypeError:
+                return func(**arguments)
+
+            # Версия берется до выполнения запроса: если данные изменятся во
+            # время выборки, результат будет сохранен со старой версией и
+            # отброшен при следующем обращении
+            version = self._current_version()
+            with self._lock:
+                if self._version != version:
+                    self._entries.clear()
+                    self._version = version
+                elif key in self._entries:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return self._entries[key]
+                self.misses += 1
+
+            result = func(**arguments)
+
+            with self._lock:
+                if self._version == version:
+                    self._entries[key] = result
+                    if len(self._entries) > self.max_size:
+                        self._entries.popitem(last=False)
+            return result
+
+        wrapper.uncached = func
+        return wrapper
+
+    def stats(self) -> dict:
+        """
+        :return: Словарь с количеством попаданий, промахов и хранимых результатов.
+        :rtype: dict
+        """
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "size": len(self._entries),
+            }
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._version = None
+
+    def _current_version(self):
+        with self._lock:
+            # Отдельное соединение, чтобы data_version менялся при
+            # изменениях через все соединения приложения. После close_all
+            # (при завершении или смене профиля PRAGMA) открывается новое
+            conn = connection_manager.shared_connection(self.CONNECTION_NAME)
+            data_version = conn.execute("PRAGMA data_version").fetchone()[0]
+        return connection_manager.write_count, data_version
+
+
+query_cache = QueryCache()
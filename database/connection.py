@@ -0,0 +1,285 @@
+import atexit
+import configparser
+import os
+import sqlite3
+from contextlib import contextmanager
+from threading import Lock, current_thread, local
+
+DATABASE = "organizer.db"
+
+# Файл настроек базы данных и переменные окружения, которые его дополняют
+CONFIG_FILE = "organizer.ini"
+CONFIG_FILE_ENV = "ORGANIZER_DB_CONFIG"
+PROFILE_ENV = "ORGANIZER_DB_PROFILE"
+
+# Наборы PRAGMA. busy_timeout идет первым, чтобы смена режима журнала
+# ждала освобождения базы данных другими соединениями.
+# - durable: каждая транзакция надежно записана на диск;
+# - fast: WAL с synchronous=NORMAL, при сбое питания могут потеряться
+#   последние транзакции, но база данных остается целой;
+# - bulk-load: для массовой загрузки, синхронизация с диском отключена.
+PROFILES = {
+    "durable": {
+        "busy_timeout": 5000,
+        "journal_mode": "WAL",
+        "synchronous": "FULL",
+        "cache_size": -8000,
+        "mmap_size": 0,
+        "temp_store": "DEFAULT",
+    },
+    "fast": {
+        "busy_timeout": 5000,
+        "journal_mode": "WAL",
+        "synchronous": "NORMAL",
+        "cache_size": -32000,
+        "mmap_size": 268435456,
+        "temp_store": "MEMORY",
+    },
+    "bulk-load": {
+        "busy_timeout": 30000,
+        "journal_mode": "WAL",
+        "synchronous": "OFF",
+        "cache_size": -262144,
+        "mmap_size": 268435456,
+        "temp_store": "MEMORY",
+    },
+}
+DEFAULT_PROFILE = "fast"
+
+
+def load_pragmas(profile=None, config_file=None):
+    """
+    Собирает PRAGMA для соединений с базой данных.
+
+    Профиль берется из аргумента, переменной окружения ORGANIZER_DB_PROFILE
+    или ключа profile секции [database] файла настроек (по умолчанию
+    organizer.ini, путь можно задать в ORGANIZER_DB_CONFIG), а если нигде не
+    задан - DEFAULT_PROFILE. Остальные ключи секции [database] заменяют
+    отдельные PRAGMA профиля, например cache_size = -65536.
+
+    :param profile: Название профиля из PROFILES.
+    :param config_file: Путь к файлу настроек.
+
+    :return: Словарь PRAGMA в порядке применения.
+    :rtype: dict
+    """
+    config = configparser.ConfigParser()
+    config.read(config_file or os.environ.get(CONFIG_FILE_ENV, CONFIG_FILE), encoding="utf-8")
+    section = config["database"] if config.has_section("database") else {}
+
+    profile = (
+        profile
+        or os.environ.get(PROFILE_ENV)
+        or section.get("profile")
+        or DEFAULT_PROFILE
+    )
+    if profile not in PROFILES:
+        raise ValueError(f"Неизвестный профиль базы данных: {profile}")
+
+    pragmas = dict(PROFILES[profile])
+    for name, value in section.items():
+        if name == "profile":
+            continue
+        if name not in pragmas:
+            raise ValueError(f"Неизвестная настройка базы данных: {name}")
+        pragmas[name] = value
+    return pragmas
+
+
+class ConnectionManager:
+    """
+    Выдает потокам долгоживущие соединения с базой данных.
+
+    Каждый поток получает одно соединение, которое открывается при первом
+    обращении и затем переиспользуется, поэтому однострочные операции не
+    платят за открытие и закрытие базы данных. Постоянных соединений
+    открывается не больше pool_size: потоки сверх этого числа получают
+    временное соединение, которое закрывается после использования.
+    Соединения завершившихся потоков (например, замененных рабочих потоков
+    пула уведомлений) закрываются при открытии новых, а все оставшиеся -
+    при завершении приложения.
+
+    Сразу после открытия к соединению применяются PRAGMA из pragmas, по
+    умолчанию - профиля, выбранного в настройках (см. load_pragmas).
+    """
+
+    DATABASE = DATABASE
+
+    # Наибольшее количество постоянных соединений: главный поток, поток
+    # планировщика, поток записи заданий и несколько рабочих потоков
+    POOL_SIZE = 8
+
+    def __init__(self, database=None, pool_size=None, pragmas=None):
+        """
+        :param database: Путь к файлу базы данных.
+        :param pool_size: Наибольшее количество постоянных соединений.
+        :param pragmas: Словарь PRAGMA, применяемых к каждому соединению.
+        """
+        self.database = database or self.DATABASE
+        self.pool_size = pool_size or self.POOL_SIZE
+        self.pragmas = load_pragmas() if pragmas is None else dict(pragmas)
+
+        self._local = local()
+        self._lock = Lock()
+        self._connections = {}
+        self._shared = {}
+
+        # Количество зафиксированных транзакций, изменивших данные. По нему
+        # кэш результатов запросов узнает об изменениях внутри приложения
+        self.write_count = 0
+
+    @contextmanager
+    def connection(self):
+        """
+        Возвращает соединение текущего потока для выполнения операции.
+
+        Блок выполняется как одна транзакция: при успешном завершении
+        изменения фиксируются, при исключении - откатываются. Вложенные
+        блоки того же потока используют то же соединение и фиксируются
+        вместе с внешним.
+
+        :return: Контекстный менеджер, возвращающий sqlite3.Connection.
+        """
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            self._local.depth += 1
+            try:
+                yield conn
+            finally:
+                self._local.depth -= 1
+            return
+
+        conn, persistent = self._open()
+        self._local.conn = conn
+        self._local.depth = 0
+        total_changes = conn.total_changes
+        try:
+            yield conn
+            conn.commit()
+            if conn.total_changes != total_changes:
+                with self._lock:
+                    self.write_count += 1
+        except BaseException:
+            conn.rollback()
+            raise
+        finally:
+            if persistent:
+                # Соединение остается открытым, но блок больше не вложен
+                self._local.persistent = conn
+            else:
+                conn.close()
+            self._local.conn = None
+
+    @contextmanager
+    def reader(self):
+        """
+        Открывает отдельное соединение для потокового чтения, которое
+        закрывается при выходе из блока. В отличие от connection() оно не
+        участвует в транзакциях потока, поэтому запись, выполненная во время
+        чтения, фиксируется сразу, а не после окончания чтения.
+
+        :return: Контекстный менеджер, возвращающий sqlite3.Connection.
+        """
+        conn = self._connect()
+        try:
+            yield conn
+        finally:
+            conn.close()
+
+    def use_profile(self, profile):
+        """
+        Переключает соединения на другой профиль PRAGMA, например на
+        bulk-load на время массовой загрузки. Открытые постоянные
+        соединения закрываются и будут открыты заново с новыми PRAGMA,
+        поэтому вызывать его нужно, пока другие потоки не работают с базой
+        данных.
+
+        :param profile: Название профиля из PROFILES.
+        """
+        self.pragmas = load_pragmas(profile)
+        self.close_all()
+
+    def close_thread_connection(self):
+        """
+        Закрывает постоянное соединение текущего потока, если оно есть.
+        """
+        conn = getattr(self._local, "persistent", None)
+        if conn is None:
+            return
+
+        with self._lock:
+            self._connections.pop(current_thread(), None)
+        self._local.persistent = None
+        conn.close()
+
+    def shared_connection(self, name):
+        """
+        Возвращает именованное соединение, не привязанное к потоку,
+        например, для служебных запросов кэша. Соединение открывается с
+        теми же PRAGMA, что и остальные, закрывается close_all и после
+        этого открывается заново при следующем вызове. Вызывающий код сам
+        отвечает за то, чтобы соединением не пользовались одновременно
+        несколько потоков.
+
+        :param name: Название соединения.
+
+        :return: Соединение с базой данных.
+        :rtype: sqlite3.Connection
+        """
+        with self._lock:
+            conn = self._shared.get(name)
+            if conn is None:
+                conn = self._shared[name] = self._connect()
+        return conn
+
+    def close_all(self):
+        """
+        Закрывает все постоянные и именованные соединения. Вызывается при
+        завершении приложения.
+        """
+        with self._lock:
+            connections, self._connections = self._connections, {}
+            shared, self._shared = self._shared, {}
+        for conn in list(connections.values()) + list(shared.values()):
+            conn.close()
+
+    def _open(self):
+        """
+        :return: Кортеж из соединения и флага, является ли оно постоянным.
+        """
+        # Соединение, закрытое close_all, уже удалено из реестра
+        conn = getattr(self._local, "persistent", None)
+        if conn is not None and self._connections.get(current_thread()) is conn:
+            return conn, True
+
+        with self._lock:
+            self._reap()
+            persistent = len(self._connections) < self.pool_size
+
+            conn = self._connect()
+            if persistent:
+                self._connections[current_thread()] = conn
+        return conn, persistent
+
+    def _connect(self):
+        # Соединение закрывается из другого потока при завершении приложения
+        # или после завершения потока-владельца
+        conn = sqlite3.connect(self.database, check_same_thread=False)
+        for name, value in self.pragmas.items():
+            conn.execute(f"PRAGMA {name} = {value}")
+        return conn
+
+    def _reap(self):
+        """
+        Закрывает соединения завершившихся потоков. Вызывается под
+        блокировкой.
+        """
+        for thread in [thread for thread in self._connections if not thread.is_alive()]:
+            self._connections.pop(thread).close()
+
+
+connection_manager = ConnectionManager()
+connection = connection_manager.connection
+reader = connection_manager.reader
+
+atexit.register(connection_manager.close_all)
@@ -0,0 +1,352 @@
+import logging
+from datetime import datetime
+from typing import Optional, Sequence, Tuple
+
+from .connection import connection
+from .models import (
+    category_task_counts_table,
+    categories_counts_insert_trigger,
+    categories_counts_delete_trigger,
+    tasks_counts_insert_trigger,
+    tasks_counts_delete_trigger,
+    tasks_counts_update_trigger,
+    tasks_archive_counts_insert_trigger,
+    tasks_archive_counts_delete_trigger,
+    tasks_archive_counts_update_trigger,
+    schema_version_table,
+    tasks_category_page_index,
+    tasks_category_status_due_date_index,
+    tasks_fts_table,
+    tasks_fts_insert_trigger,
+    tasks_fts_insert_guarded_trigger,
+    tasks_fts_delete_trigger,
+    tasks_fts_delete_guarded_trigger,
+    tasks_fts_update_trigger,
+    tasks_completed_at_column,
+    tasks_completed_at_index,
+    tasks_completed_at_insert_trigger,
+    tasks_completed_at_insert_guarded_trigger,
+    tasks_bulk_insert_table,
+    tasks_completed_at_update_trigger,
+    tasks_archive_table,
+    tasks_archive_due_date_index,
+    tasks_archive_category_index,
+    tasks_status_due_date_index,
+    tasks_category_index,
+    tasks_due_date_index,
+    task_recurrences_last_index,
+    task_recurrences_next_index,
+    task_recurrences_table,
+    scheduled_jobs_table,
+    categories_table,
+    statuses_table,
+    tasks_table,
+)
+
+logger = logging.getLogger(__name__)
+
+# Количество строк, обрабатываемых одной транзакцией заполнения
+BACKFILL_BATCH_SIZE = 5000
+
+
+class Migration:
+    """
+    Шаг изменения схемы базы данных.
+
+    Инструкции statements выполняются одной транзакцией вместе с записью
+    версии в schema_version. Необязательное заполнение backfill - пара
+    (таблица, SQL) - выполняется после этого пачками по диапазонам rowid,
+    каждая пачка отдельной транзакцией, чтобы большая таблица не
+    блокировалась на запись надолго. SQL заполнения получает параметры
+    :low и :high и должен обрабатывать строки с low < rowid <= high.
+    Позиция заполнения сохраняется в той же транзакции, что и пачка,
+    поэтому прерванное заполнение продолжается с места остановки.
+
+    Строки, добавленные после начала заполнения, приложение должно сразу
+    записывать в новом формате.
+    """
+
+    __slots__ = ("version", "description", "statements", "backfill")
+
+    def __init__(
+            self,
+            version: int,
+            description: str,
+            statements: Sequence[str],
+            backfill: Optional[Tuple[str, str]] = None
+    ):
+        self.version = version
+        self.description = description
+        self.statements = statements
+        self.backfill = backfill
+
+
+# Миграции в порядке версий. Уже выпущенные миграции не изменяются:
+# изменения схемы добавляются новыми миграциями в конец списка
+MIGRATIONS = [
+    Migration(1, "Базовая схема", [
+        categories_table,
+        statuses_table,
+        tasks_table,
+        scheduled_jobs_table,
+        task_recurrences_table,
+        task_recurrences_next_index,
+        task_recurrences_last_index,
+        "INSERT OR IGNORE INTO categories (name) VALUES ('Неопределенные')",
+        "INSERT OR IGNORE INTO statuses (name) VALUES ('Новая')",
+        "INSERT OR IGNORE INTO statuses (name) VALUES ('В процессе')",
+        "INSERT OR IGNORE INTO statuses (name) VALUES ('Завершена')",
+    ]),
+    Migration(2, "Индексы задач по срокам, категориям и статусам", [
+        tasks_due_date_index,
+        tasks_category_index,
+        tasks_status_due_date_index,
+    ]),
+    Migration(3, "Индекс страниц задач категории", [
+        tasks_category_page_index,
+    ]),
+    # Существующие задачи индексируются пачками, а новые и измененные -
+    # триггерами. Заполнение выполняется при запуске до начала работы с
+    # задачами, поэтому триггеры не изменяют еще не проиндексированные строки
+    Migration(4, "Полнотекстовый поиск задач", [
+        tasks_fts_table,
+        tasks_fts_insert_trigger,
+        tasks_fts_delete_trigger,
+        tasks_fts_update_trigger,
+    ], backfill=("tasks", """
+        INSERT INTO tasks_fts (rowid, name, description)
+        SELECT id, name, description FROM tasks
+        WHERE id > :low AND id <= :high
+    """)),
+    # Время завершения уже завершенных задач неизвестно, поэтому им
+    # назначается время миграции и они попадут в архив не сразу
+    Migration(5, "Время завершения задач и архив", [
+        tasks_completed_at_column,
+        tasks_completed_at_index,
+        tasks_completed_at_insert_trigger,
+        tasks_completed_at_update_trigger,
+        tasks_archive_table,
+        tasks_archive_due_date_index,
+        tasks_archive_category_index,
+    ], backfill=("tasks", """
+        UPDATE tasks SET completed_at = strftime('%Y-%m-%d %H:%M:%S', 'now', 'localtime')
+        WHERE id > :low AND id <= :high
+          AND completed_at IS NULL
+          AND status_id = (SELECT id FROM statuses WHERE name = 'Завершена')
+    """)),
+    # Раньше записи заданий оставались после удаления задачи и после
+    # срабатывания напоминания без повторения
+    Migration(6, "Очистка заданий планировщика", [
+        """
+        DELETE FROM scheduled_jobs
+        WHERE task_id NOT IN (SELECT id FROM tasks)
+           OR (next_fire_time IS NULL
+               AND task_id NOT IN (SELECT task_id FROM task_recurrences))
+        """,
+    ]),
+    Migration(7, "Покрывающий индекс количества задач по категориям", [
+        tasks_category_status_due_date_index,
+        "DROP INDEX IF EXISTS idx_tasks_category_id",
+    ]),
+    # Построчные триггеры добавления задач замедляли add_tasks_bulk в
+    # несколько раз, поэтому при пакетном добавлении они отключаются
+    Migration(8, "Пакетное добавление задач без построчных триггеров", [
+        tasks_bulk_insert_table,
+        "DROP TRIGGER IF EXISTS tasks_fts_insert",
+        tasks_fts_insert_guarded_trigger,
+        "DROP TRIGGER IF EXISTS tasks_completed_at_insert",
+        tasks_completed_at_insert_guarded_trigger,
+    ]),
+    # Построчное удаление из полнотекстового индекса замедляло пакетное
+    # удаление задач и архивирование примерно в девять раз
+    Migration(9, "Пакетное удаление задач без построчных триггеров", [
+        "DROP TRIGGER IF EXISTS tasks_fts_delete",
+        tasks_fts_delete_guarded_trigger,
+    ]),
+    # Количества по архиву заполняются сразу по индексу категорий архива,
+    # а по задачам - пачками. Как и в миграции 4, заполнение выполняется
+    # до начала работы с задачами, поэтому триггеры не изменяют еще не
+    # учтенные строки
+    Migration(10, "Количество задач по категориям", [
+        category_task_counts_table,
+        categories_counts_insert_trigger,
+        categories_counts_delete_trigger,
+        tasks_counts_insert_trigger,
+        tasks_counts_delete_trigger,
+        tasks_counts_update_trigger,
+        tasks_archive_counts_insert_trigger,
+        tasks_archive_counts_delete_trigger,
+        tasks_archive_counts_update_trigger,
+        """
+        INSERT INTO category_task_counts (category_id, archived)
+        SELECT id, (SELECT COUNT(*) FROM tasks_archive WHERE category_id = categories.id)
+        FROM categories
+        """,
+    ], backfill=("tasks", """
+        UPDATE category_task_counts
+        SET total = category_task_counts.total + batch.total,
+            completed = category_task_counts.completed + batch.completed
+        FROM (
+            SELECT category_id,
+                   COUNT(*) AS total,
+                   SUM(status_id = (SELECT id FROM statuses WHERE name = 'Завершена')) AS completed
+            FROM tasks
+            WHERE id > :low AND id <= :high
+            GROUP BY category_id
+        ) AS batch
+        WHERE category_task_counts.category_id = batch.category_id
+    """)),
+]
+
+LATEST_VERSION = MIGRATIONS[-1].version
+
+
+def fetch_schema_version() -> Tuple[int, bool]:
+    """
+    Определяет версию схемы базы данных.
+
+    :return: Кортеж из номера последней примененной миграции (0 для новой
+             базы данных) и флага, есть ли незавершенные заполнения.
+    :rtype: Tuple[int, bool]
+    """
+    with connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'schema_version'"
+        )
+        if not cursor.fetchone():
+            return 0, False
+
+        cursor.execute("""
+            SELECT COALESCE(MAX(version), 0),
+                   COALESCE(SUM(completed_at IS NULL), 0)
+            FROM schema_version
+            """)
+        version, pending = cursor.fetchone()
+    return version, pending > 0
+
+
+def migrate(batch_size: int = BACKFILL_BATCH_SIZE) -> int:
+    """
+    Приводит схему базы данных к последней версии: применяет недостающие
+    миграции по порядку и завершает прерванные заполнения. Если схема уже
+    актуальна, выполняется один запрос без DDL.
+
+    Вызывается вне других блоков connection(), иначе пачки заполнения
+    не будут фиксироваться по отдельности.
+
+    :param batch_size: Количество строк в одной транзакции заполнения.
+
+    :return: Количество примененных миграций.
+    :rtype: int
+    """
+    version, pending = fetch_schema_version()
+    if version == LATEST_VERSION and not pending:
+        return 0
+
+    if version > LATEST_VERSION:
+        raise RuntimeError(
+            f"Версия схемы базы данных {version} новее версии приложения {LATEST_VERSION}."
+        )
+
+    if pending:
+        with connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("SELECT version FROM schema_version WHERE completed_at IS NULL")
+            unfinished = [row[0] for row in cursor.fetchall()]
+        migrations = {migration.version: migration for migration in MIGRATIONS}
+        for unfinished_version in unfinished:
+            _run_backfill(migrations[unfinished_version], batch_size)
+
+    applied = 0
+    for migration in MIGRATIONS:
+        if migration.version <= version:
+            continue
+
+        logger.info("Миграция схемы %d: %s", migration.version, migration.description)
+        if _apply(migration):
+            applied += 1
+        # Если миграцию применило другое приложение, его заполнение могло
+        # прерваться. Заполнение продолжается с сохраненной позиции
+        if migration.backfill:
+            _run_backfill(migration, batch_size)
+
+    return applied
+
+
+def _apply(migration: Migration) -> bool:
+    """
+    Применяет изменения схемы миграции и записывает ее версию.
+
+    :return: False, если миграция уже была применена другим приложением.
+    :rtype: bool
+    """
+    with connection() as conn:
+        cursor = conn.cursor()
+        # DDL не открывает транзакцию неявно, поэтому открываем ее сами,
+        # чтобы изменения схемы и запись версии применились вместе
+        cursor.execute("BEGIN IMMEDIATE")
+        cursor.execute(schema_version_table)
+
+        # Миграцию могло уже применить другое запущенное приложение
+        cursor.execute("SELECT 1 FROM schema_version WHERE version = ?", (migration.version,))
+        if cursor.fetchone():
+            return False
+
+        for statement in migration.statements:
+            cursor.execute(statement)
+
+        now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        cursor.execute(
+            """
+            INSERT INTO schema_version
+            (version, description, applied_at, backfill_position, completed_at)
+            VALUES (?, ?, ?, 0, ?)
+            """,
+            (migration.version, migration.description, now,
+             None if migration.backfill else now)
+        )
+    return True
+
+
+def _run_backfill(migration: Migration, batch_size: int):
+    """
+    Выполняет заполнение миграции пачками, начиная с сохраненной позиции.
+    Позиция читается заново под блокировкой на запись перед каждой
+    пачкой, поэтому заполнение, которое одновременно выполняет другое
+    приложение, не обрабатывает одни и те же строки дважды.
+    """
+    table, sql = migration.backfill
+
+    with connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute(f"SELECT MAX(rowid) FROM {table}")
+        last_rowid = cursor.fetchone()[0] or 0
+
+    while True:
+        with connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("BEGIN IMMEDIATE")
+            cursor.execute(
+                "SELECT backfill_position, completed_at FROM schema_version WHERE version = ?",
+                (migration.version,)
+            )
+            position, completed_at = cursor.fetchone()
+            if completed_at is not None:
+                return
+
+            if position >= last_rowid:
+                cursor.execute(
+                    "UPDATE schema_version SET completed_at = ? WHERE version = ?",
+                    (datetime.now().strftime("%Y-%m-%d %H:%M:%S"), migration.version)
+                )
+                break
+
+            high = position + batch_size
+            cursor.execute(sql, {"low": position, "high": high})
+            cursor.execute(
+                "UPDATE schema_version SET backfill_position = ? WHERE version = ?",
+                (high, migration.version)
+            )
+
+    logger.info("Заполнение миграции %d завершено", migration.version)
@@ -26,3 +26,304 @@ CREATE TABLE IF NOT EXISTS tasks (
     FOREIGN KEY (category_id) REFERENCES categories(id)
 )
 """
+
+scheduled_jobs_table = """
+CREATE TABLE IF NOT EXISTS scheduled_jobs (
+    task_id INTEGER PRIMARY KEY,
+    next_fire_time REAL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    last_fired_at REAL,
+    FOREIGN KEY (task_id) REFERENCES tasks(id)
+)
+"""
+
+task_recurrences_table = """
+CREATE TABLE IF NOT EXISTS task_recurrences (
+    task_id INTEGER PRIMARY KEY,
+    frequency TEXT NOT NULL,
+    interval INTEGER NOT NULL DEFAULT 1,
+    weekdays INTEGER NOT NULL DEFAULT 0,
+    next_occurrence TEXT,
+    last_occurrence TEXT,
+    FOREIGN KEY (task_id) REFERENCES tasks(id)
+)
+"""
+
+task_recurrences_next_index = """
+CREATE INDEX IF NOT EXISTS idx_task_recurrences_next_occurrence
+ON task_recurrences (next_occurrence)
+"""
+
+task_recurrences_last_index = """
+CREATE INDEX IF NOT EXISTS idx_task_recurrences_last_occurrence
+ON task_recurrences (last_occurrence)
+"""
+
+tasks_due_date_index = """
+CREATE INDEX IF NOT EXISTS idx_tasks_due_date
+ON tasks (due_date)
+"""
+
+tasks_category_index = """
+CREATE INDEX IF NOT EXISTS idx_tasks_category_id
+ON tasks (category_id)
+"""
+
+tasks_status_due_date_index = """
+CREATE INDEX IF NOT EXISTS idx_tasks_status_id_due_date
+ON tasks (status_id, due_date)
+"""
+
+# Порядок страниц задач категории (priority DESC, due_date, id): страница
+# читается по индексу без сортировки
+tasks_category_page_index = """
+CREATE INDEX IF NOT EXISTS idx_tasks_category_id_priority_due_date
+ON tasks (category_id, priority DESC, due_date)
+"""
+
+# Полнотекстовый индекс названий и описаний задач. Таблица хранит только
+# индекс, а сами тексты берет из tasks (external content), поэтому
+# синхронизируется триггерами ниже. Префиксные индексы на 2 и 3 символа
+# ускоряют поиск по началу слова при вводе
+tasks_fts_table = """
+CREATE VIRTUAL TABLE IF NOT EXISTS tasks_fts USING fts5(
+    name,
+    description,
+    content='tasks',
+    content_rowid='id',
+    prefix='2 3'
+)
+"""
+
+tasks_fts_insert_trigger = """
+CREATE TRIGGER IF NOT EXISTS tasks_fts_insert AFTER INSERT ON tasks BEGIN
+    INSERT INTO tasks_fts (rowid, name, description)
+    VALUES (new.id, new.name, new.description);
+END
+"""
+
+tasks_fts_delete_trigger = """
+CREATE TRIGGER IF NOT EXISTS tasks_fts_delete AFTER DELETE ON tasks BEGIN
+    INSERT INTO tasks_fts (tasks_fts, rowid, name, description)
+    VALUES ('delete', old.id, old.name, old.description);
+END
+"""
+
+# Срабатывает только при изменении текста, а не статуса или срока
+tasks_fts_update_trigger = """
+CREATE TRIGGER IF NOT EXISTS tasks_fts_update AFTER UPDATE OF name, description ON tasks BEGIN
+    INSERT INTO tasks_fts (tasks_fts, rowid, name, description)
+    VALUES ('delete', old.id, old.name, old.description);
+    INSERT INTO tasks_fts (rowid, name, description)
+    VALUES (new.id, new.name, new.description);
+END
+"""
+
+# Время завершения задачи. Заполняется и сбрасывается триггерами ниже
+# при любом изменении статуса, поэтому функции записи его не задают
+tasks_completed_at_column = """
+ALTER TABLE tasks ADD COLUMN completed_at TEXT
+"""
+
+# Частичный индекс: в него попадают только завершенные задачи
+tasks_completed_at_index = """
+CREATE INDEX IF NOT EXISTS idx_tasks_completed_at
+ON tasks (completed_at) WHERE completed_at IS NOT NULL
+"""
+
+tasks_completed_at_insert_trigger = """
+CREATE TRIGGER IF NOT EXISTS tasks_completed_at_insert AFTER INSERT ON tasks
+WHEN new.status_id = (SELECT id FROM statuses WHERE name = 'Завершена')
+BEGIN
+    UPDATE tasks SET completed_at = strftime('%Y-%m-%d %H:%M:%S', 'now', 'localtime')
+    WHERE id = new.id;
+END
+"""
+
+tasks_completed_at_update_trigger = """
+CREATE TRIGGER IF NOT EXISTS tasks_completed_at_update AFTER UPDATE OF status_id ON tasks
+WHEN new.status_id IS NOT old.status_id
+BEGIN
+    UPDATE tasks SET completed_at = CASE
+        WHEN new.status_id = (SELECT id FROM statuses WHERE name = 'Завершена')
+        THEN strftime('%Y-%m-%d %H:%M:%S', 'now', 'localtime')
+    END
+    WHERE id = new.id;
+END
+"""
+
+# Пока в таблице есть строка, построчные триггеры добавления и удаления
+# задач не срабатывают. Пакетные функции записи добавляют ее в точке
+# сохранения и удаляют до фиксации, а полнотекстовый индекс и время
+# завершения обновляют сами для всей пачки сразу. Другие соединения
+# незафиксированную строку не видят
+tasks_bulk_insert_table = """
+CREATE TABLE IF NOT EXISTS tasks_bulk_insert (
+    id INTEGER PRIMARY KEY
+)
+"""
+
+tasks_fts_insert_guarded_trigger = """
+CREATE TRIGGER IF NOT EXISTS tasks_fts_insert AFTER INSERT ON tasks
+WHEN NOT EXISTS (SELECT 1 FROM tasks_bulk_insert)
+BEGIN
+    INSERT INTO tasks_fts (rowid, name, description)
+    VALUES (new.id, new.name, new.description);
+END
+"""
+
+tasks_completed_at_insert_guarded_trigger = """
+CREATE TRIGGER IF NOT EXISTS tasks_completed_at_insert AFTER INSERT ON tasks
+WHEN NOT EXISTS (SELECT 1 FROM tasks_bulk_insert)
+  AND new.status_id = (SELECT id FROM statuses WHERE name = 'Завершена')
+BEGIN
+    UPDATE tasks SET completed_at = strftime('%Y-%m-%d %H:%M:%S', 'now', 'localtime')
+    WHERE id = new.id;
+END
+"""
+
+tasks_fts_delete_guarded_trigger = """
+CREATE TRIGGER IF NOT EXISTS tasks_fts_delete AFTER DELETE ON tasks
+WHEN NOT EXISTS (SELECT 1 FROM tasks_bulk_insert)
+BEGIN
+    INSERT INTO tasks_fts (tasks_fts, rowid, name, description)
+    VALUES ('delete', old.id, old.name, old.description);
+END
+"""
+
+# Архив давно завершенных задач. Задачи сохраняют свои ID, поэтому новые
+# задачи получают ID больше наибольшего и в tasks, и в архиве
+tasks_archive_table = """
+CREATE TABLE IF NOT EXISTS tasks_archive (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL,
+    description TEXT,
+    creation_date TEXT NOT NULL,
+    due_date TEXT NOT NULL,
+    priority INTEGER NOT NULL,
+    status_id INTEGER NOT NULL,
+    category_id INTEGER,
+    completed_at TEXT,
+    archived_at TEXT NOT NULL,
+    FOREIGN KEY (status_id) REFERENCES statuses(id),
+    FOREIGN KEY (category_id) REFERENCES categories(id)
+)
+"""
+
+tasks_archive_due_date_index = """
+CREATE INDEX IF NOT EXISTS idx_tasks_archive_due_date
+ON tasks_archive (due_date)
+"""
+
+# Как и у tasks, страница задач категории читается по индексу без сортировки
+tasks_archive_category_index = """
+CREATE INDEX IF NOT EXISTS idx_tasks_archive_category_id_priority_due_date
+ON tasks_archive (category_id, priority DESC, due_date)
+"""
+
+# Покрывающий индекс для количества задач по категориям: статус и срок
+# читаются из индекса, без обращения к строкам tasks. Заменяет индекс
+# idx_tasks_category_id, который совпадает с его началом
+tasks_category_status_due_date_index = """
+CREATE INDEX IF NOT EXISTS idx_tasks_category_id_status_id_due_date
+ON tasks (category_id, status_id, due_date)
+"""
+
+# Количество задач категорий, чтобы сводка по категориям не группировала
+# все задачи. Строка создается и удаляется вместе с категорией, а
+# количества обновляются триггерами ниже. Пакетные функции записи при
+# отключенных построчных триггерах обновляют их сами одним запросом на
+# пачку. Задачи переносятся в архив только завершенными, поэтому для
+# архива хранится одно количество
+category_task_counts_table = """
+CREATE TABLE IF NOT EXISTS category_task_counts (
+    category_id INTEGER PRIMARY KEY,
+    total INTEGER NOT NULL DEFAULT 0,
+    completed INTEGER NOT NULL DEFAULT 0,
+    archived INTEGER NOT NULL DEFAULT 0
+)
+"""
+
+categories_counts_insert_trigger = """
+CREATE TRIGGER IF NOT EXISTS categories_counts_insert AFTER INSERT ON categories BEGIN
+    INSERT INTO category_task_counts (category_id) VALUES (new.id);
+END
+"""
+
+categories_counts_delete_trigger = """
+CREATE TRIGGER IF NOT EXISTS categories_counts_delete AFTER DELETE ON categories BEGIN
+    DELETE FROM category_task_counts WHERE category_id = old.id;
+END
+"""
+
+tasks_counts_insert_trigger = """
+CREATE TRIGGER IF NOT EXISTS tasks_counts_insert AFTER INSERT ON tasks
+WHEN NOT EXISTS (SELECT 1 FROM tasks_bulk_insert)
+BEGIN
+    UPDATE category_task_counts
+    SET total = total + 1,
+        completed = completed + (new.status_id = (SELECT id FROM statuses WHERE name = 'Завершена'))
+    WHERE category_id = new.category_id;
+END
+"""
+
+tasks_counts_delete_trigger = """
+CREATE TRIGGER IF NOT EXISTS tasks_counts_delete AFTER DELETE ON tasks
+WHEN NOT EXISTS (SELECT 1 FROM tasks_bulk_insert)
+BEGIN
+    UPDATE category_task_counts
+    SET total = total - 1,
+        completed = completed - (old.status_id = (SELECT id FROM statuses WHERE name = 'Завершена'))
+    WHERE category_id = old.category_id;
+END
+"""
+
+tasks_counts_update_trigger = """
+CREATE TRIGGER IF NOT EXISTS tasks_counts_update AFTER UPDATE OF status_id, category_id ON tasks
+WHEN new.status_id IS NOT old.status_id OR new.category_id IS NOT old.category_id
+BEGIN
+    UPDATE category_task_counts
+    SET total = total - 1,
+        completed = completed - (old.status_id = (SELECT id FROM statuses WHERE name = 'Завершена'))
+    WHERE category_id = old.category_id;
+    UPDATE category_task_counts
+    SET total = total + 1,
+        completed = completed + (new.status_id = (SELECT id FROM statuses WHERE name = 'Завершена'))
+    WHERE category_id = new.category_id;
+END
+"""
+
+tasks_archive_counts_insert_trigger = """
+CREATE TRIGGER IF NOT EXISTS tasks_archive_counts_insert AFTER INSERT ON tasks_archive BEGIN
+    UPDATE category_task_counts SET archived = archived + 1
+    WHERE category_id = new.category_id;
+END
+"""
+
+tasks_archive_counts_delete_trigger = """
+CREATE TRIGGER IF NOT EXISTS tasks_archive_counts_delete AFTER DELETE ON tasks_archive BEGIN
+    UPDATE category_task_counts SET archived = archived - 1
+    WHERE category_id = old.category_id;
+END
+"""
+
+tasks_archive_counts_update_trigger = """
+CREATE TRIGGER IF NOT EXISTS tasks_archive_counts_update AFTER UPDATE OF category_id ON tasks_archive
+WHEN new.category_id IS NOT old.category_id
+BEGIN
+    UPDATE category_task_counts SET archived = archived - 1
+    WHERE category_id = old.category_id;
+    UPDATE category_task_counts SET archived = archived + 1
+    WHERE category_id = new.category_id;
+END
+"""
+
+schema_version_table = """
+CREATE TABLE IF NOT EXISTS schema_version (
+    version INTEGER PRIMARY KEY,
+    description TEXT NOT NULL,
+    applied_at TEXT NOT NULL,
+    backfill_position INTEGER NOT NULL DEFAULT 0,
+    completed_at TEXT
+)
+"""
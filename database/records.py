@@ -0,0 +1,119 @@
+from collections.abc import Mapping
+from typing import Any, List, Optional
+
+
+class Record(Mapping):
+    """
+    Компактная запись строки базы данных с доступом как к словарю.
+
+    Значения хранятся в __slots__, а не в словаре экземпляра, поэтому
+    запись занимает в несколько раз меньше памяти, чем словарь с теми же
+    ключами. Ключами служат имена полей из FIELDS, а ALIASES задает
+    дополнительные имена, под которыми поля доступны для совместимости,
+    например task_id для id.
+    """
+
+    __slots__ = ()
+
+    FIELDS = ()
+    ALIASES = {}
+
+    def __getitem__(self, key: str) -> Any:
+        try:
+            field = self.ALIASES.get(key, key)
+        except TypeError:
+            raise KeyError(key) from None
+        if field not in self.FIELDS:
+            raise KeyError(key)
+        return getattr(self, field)
+
+    def __setitem__(self, key: str, value: Any):
+        field = self.ALIASES.get(key, key)
+        if field not in self.FIELDS:
+            raise KeyError(key)
+        setattr(self, field, value)
+
+    def __contains__(self, key: object) -> bool:
+        return key in self.FIELDS or key in self.ALIASES
+
+    def __iter__(self):
+        return iter(self.FIELDS)
+
+    def __len__(self) -> int:
+        return len(self.FIELDS)
+
+    def __repr__(self) -> str:
+        values = ", ".join(f"{field}={getattr(self, field)!r}" for field in self.FIELDS)
+        return f"{type(self).__name__}({values})"
+
+
+class Task(Record):
+    """
+    Задача. Поля совпадают с ключами словарей fetch_tasks, а ключи
+    task_id, task_name и status_name, которые использовались в задачах
+    fetch_categories, остаются доступны как псевдонимы.
+    """
+
+    FIELDS = ("id", "name", "description", "creation_date", "due_date", "priority", "status", "category")
+    ALIASES = {
+        "task_id": "id",
+        "task_name": "name",
+        "status_name": "status",
+    }
+
+    __slots__ = FIELDS
+
+    def __init__(
+            self,
+            id: int,
+            name: str,
+            description: Optional[str],
+            creation_date: str,
+            due_date: str,
+            priority: int,
+            status: Optional[str],
+            category: Optional[str]
+    ):
+        self.id = id
+        self.name = name
+        self.description = description
+        self.creation_date = creation_date
+        self.due_date = due_date
+        self.priority = priority
+        self.status = status
+        self.category = category
+
+    @classmethod
+    def row_factory(cls, cursor, row: tuple) -> "Task":
+        """
+        Фабрика строк для sqlite3.Cursor.row_factory. Ожидает столбцы в
+        порядке FIELDS.
+        """
+        return cls(*row)
+
+
+class Category(Record):
+    """
+    Категория с задачами. next_cursor - курсор следующей страницы задач,
+    если задачи извлечены страницей, иначе None.
+    """
+
+    FIELDS = ("category_id", "category_name", "tasks", "next_cursor")
+    ALIASES = {
+        "id": "category_id",
+        "name": "category_name",
+    }
+
+    __slots__ = FIELDS
+
+    def __init__(
+            self,
+            category_id: int,
+            category_name: str,
+            tasks: Optional[List[Task]] = None,
+            next_cursor: Optional[str] = None
+    ):
+        self.category_id = category_id
+        self.category_name = category_name
+        self.tasks = [] if tasks is None else tasks
+        self.next_cursor = next_cursor
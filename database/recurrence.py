@@ -0,0 +1,239 @@
+import calendar
+from datetime import datetime, timedelta
+from typing import Optional
+
+
+class RecurrenceRule:
+    """
+    Правило повторения задачи.
+
+    Хранит только частоту, интервал и маску дней недели, а конкретные
+    даты вычисляет по требованию, поэтому правило никогда не
+    разворачивается в список повторений.
+    """
+
+    HOURLY = "hourly"
+    DAILY = "daily"
+    WEEKLY = "weekly"
+    MONTHLY = "monthly"
+
+    FREQUENCIES = (HOURLY, DAILY, WEEKLY, MONTHLY)
+
+    # Маска дней недели: бит 0 - понедельник, бит 6 - воскресенье
+    WEEKDAYS = 0b0011111
+    WEEKEND = 0b1100000
+
+    # Ограничение перебора для масок, которым не подходит ни одна дата
+    MAX_STEPS = 1000
+
+    __slots__ = ("frequency", "interval", "weekdays", "start")
+
+    def __init__(
+            self,
+            frequency: str,
+            interval: int = 1,
+            weekdays: int = 0,
+            start: Optional[datetime] = None
+    ):
+        """
+        :param frequency: Частота повторения: HOURLY, DAILY, WEEKLY или MONTHLY.
+        :param interval: Шаг повторения в единицах частоты, например, 2 для
+                         "каждые два дня".
+        :param weekdays: Маска дней недели, в которые допускается повторение.
+                         0 означает любые дни (для WEEKLY - день недели start).
+        :param start: Первое повторение, от которого отсчитываются остальные.
+        """
+        if frequency not in self.FREQUENCIES:
+            raise ValueError(f"Неизвестная частота повторения: {frequency}")
+        if interval < 1:
+            raise ValueError("Интервал повторения должен быть положительным.")
+
+        self.frequency = frequency
+        self.interval = interval
+        self.weekdays = weekdays
+        self.start = start
+
+    def __eq__(self, other):
+        if not isinstance(other, RecurrenceRule):
+            return NotImplemented
+        return (
+            self.frequency == other.frequency
+            and self.interval == other.interval
+            and self.weekdays == other.weekdays
+        )
+
+    def __repr__(self):
+        return (
+            f"RecurrenceRule({self.frequency!r}, interval={self.interval}, "
+            f"weekdays={self.weekdays:#09b}, start={self.start!r})"
+        )
+
+    def _matches_weekday(self, date_time: datetime) -> bool:
+        return not self.weekdays or bool(self.weekdays & (1 << date_time.weekday()))
+
+    def next_occurrence(self, after: datetime) -> Optional[datetime]:
+        """
+        Вычисляет ближайшее повторение строго после указанного момента.
+
+        :param after: Момент времени, после которого ищется повторение.
+
+        :return: Дата и время повторения или None, если правило не дает
+                 ни одной даты.
+        :rtype: Optional[datetime]
+        """
+        start = self.start or after
+        if after < start and self._matches_weekday(start):
+            return start
+
+        if self.frequency == self.HOURLY:
+            return self._next_hourly(start, after)
+        if self.frequency == self.DAILY:
+            return self._next_daily(start, after)
+        if self.frequency == self.WEEKLY:
+            return self._next_weekly(start, after)
+        return self._next_monthly(start, after)
+
+    def previous_occurrence(self, before: datetime) -> Optional[datetime]:
+        """
+        Вычисляет последнее повторение не позже указанного момента.
+
+        :param before: Момент времени, до которого ищется повторение.
+
+        :return: Дата и время повторения или None, если до этого момента
+                 повторений не было.
+        :rtype: Optional[datetime]
+        """
+        start = self.start or before
+        if before < start:
+            return None
+
+        if self.frequency == self.HOURLY:
+            return self._previous_hourly(start, before)
+        if self.frequency == self.DAILY:
+            return self._previous_daily(start, before)
+        if self.frequency == self.WEEKLY:
+            return self._previous_weekly(start, before)
+        return self._previous_monthly(start, before)
+
+    def next_timestamp(self, after: float) -> Optional[float]:
+        """
+        То же, что next_occurrence, но в секундах Unix. Используется
+        планировщиком задач.
+
+        :param after: Момент времени в секундах Unix.
+
+        :return: Время повторения в секундах Unix или None.
+        :rtype: Optional[float]
+        """
+        occurrence = self.next_occurrence(datetime.fromtimestamp(after))
+        return occurrence.timestamp() if occurrence else None
+
+    def _next_hourly(self, start, after):
+        step = timedelta(hours=self.interval)
+        steps = max(0, (after - start) // step + 1)
+        candidate = start + steps * step
+
+        for _ in range(self.MAX_STEPS):
+            if self._matches_weekday(candidate):
+                return candidate
+            candidate += step
+        return None
+
+    def _previous_hourly(self, start, before):
+        step = timedelta(hours=self.interval)
+        candidate = start + (before - start) // step * step
+
+        for _ in range(self.MAX_STEPS):
+            if candidate < start:
+                return None
+            if self._matches_weekday(candidate):
+                return candidate
+            candidate -= step
+        return None
+
+    def _next_daily(self, start, after):
+        days = max(0, (after.date() - start.date()).days)
+        offset = days - days % self.interval
+
+        for _ in range(self.MAX_STEPS):
+            candidate = start + timedelta(days=offset)
+            if candidate > after and self._matches_weekday(candidate):
+                return candidate
+            offset += self.interval
+        return None
+
+    def _previous_daily(self, start, before):
+        days = (before.date() - start.date()).days
+        offset = days - days % self.interval
+
+        for _ in range(self.MAX_STEPS):
+            if offset < 0:
+                return None
+            candidate = start + timedelta(days=offset)
+            if candidate <= before and self._matches_weekday(candidate):
+                return candidate
+            offset -= self.interval
+        return None
+
+    def _next_weekly(self, start, after):
+        weekdays = self.weekdays or 1 << start.weekday()
+        week_start = start.date() - timedelta(days=start.weekday())
+        day = max(after.date(), start.date())
+
+        for _ in range(self.MAX_STEPS):
+            week = (day - week_start).days // 7
+            if week % self.interval == 0 and weekdays & (1 << day.weekday()):
+                candidate = datetime.combine(day, start.time())
+                if candidate > after:
+                    return candidate
+            day += timedelta(days=1)
+        return None
+
+    def _previous_weekly(self, start, before):
+        weekdays = self.weekdays or 1 << start.weekday()
+        week_start = start.date() - timedelta(days=start.weekday())
+        day = before.date()
+
+        for _ in range(self.MAX_STEPS):
+            if day < start.date():
+                return None
+            week = (day - week_start).days // 7
+            if week % self.interval == 0 and weekdays & (1 << day.weekday()):
+                candidate = datetime.combine(day, start.time())
+                if start <= candidate <= before:
+                    return candidate
+            day -= timedelta(days=1)
+        return None
+
+    def _next_monthly(self, start, after):
+        months = max(0, (after.year - start.year) * 12 + after.month - start.month)
+        offset = months - months % self.interval
+
+        for _ in range(self.MAX_STEPS):
+            year, month = divmod(start.month - 1 + offset, 12)
+            year += start.year
+            month += 1
+            # Для коротких месяцев берется последний день месяца
+            day = min(start.day, calendar.monthrange(year, month)[1])
+            candidate = start.replace(year=year, month=month, day=day)
+            if candidate > after and self._matches_weekday(candidate):
+                return candidate
+            offset += self.interval
+        return None
+
+    def _previous_monthly(self, start, before):
+        months = (before.year - start.year) * 12 + before.month - start.month
+        offset = months - months % self.interval
+
+        for _ in range(self.MAX_STEPS):
+            if offset < 0:
+                return None
+            year, month = divmod(start.month - 1 + offset, 12)
+            year += start.year
+            month += 1
+            day = min(start.day, calendar.monthrange(year, month)[1])
+            candidate = start.replace(year=year, month=month, day=day)
+            if candidate <= before and self._matches_weekday(candidate):
+                return candidate
+            offset -= self.interval
+        return None
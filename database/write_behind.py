@@ -0,0 +1,185 @@
+import atexit
+import logging
+import sqlite3
+import time
+from concurrent.futures import Future
+from queue import Empty, SimpleQueue
+from threading import Condition, Thread
+from typing import Any, Callable, Optional, Tuple
+
+from .connection import connection
+
+logger = logging.getLogger(__name__)
+
+
+class WriteBehindQueue:
+    """
+    Очередь отложенной записи для изменений, выполняемых из интерфейса.
+
+    Функции записи базы данных (change_task_status, delete_task и другие,
+    возвращающие кортеж (успех, ошибка)) не выполняются в вызывающем
+    потоке, а ставятся в очередь. Отдельный поток записи собирает все
+    изменения, поступившие в течение FLUSH_DELAY, и выполняет их одной
+    транзакцией, поэтому серия нажатий стоит одну синхронизацию с диском
+    вместо синхронизации на каждое нажатие.
+
+    Каждое изменение выполняется в своей точке сохранения: если функция
+    вернула ошибку или выбросила исключение, откатываются только ее
+    изменения, а остальные изменения пачки фиксируются.
+
+    submit возвращает Future с результатом функции. Вызывающий код, которому
+    нужно подтверждение (например, чтобы перечитать данные после записи),
+    получает его через add_done_callback или result() с ограничением
+    времени. Отмененные до записи изменения не выполняются.
+    """
+
+    # Время в секундах, в течение которого изменения собираются в пачку
+    FLUSH_DELAY = 0.005
+
+    # Наибольшее количество изменений в одной транзакции
+    MAX_BATCH = 1000
+
+    # Сколько секунд при завершении приложения ждать записи очереди
+    EXIT_TIMEOUT = 5.0
+
+    def __init__(self, flush_delay: Optional[float] = None, max_batch: Optional[int] = None):
+        """
+        :param flush_delay: Время сбора пачки в секундах.
+        :param max_batch: Наибольшее количество изменений в одной транзакции.
+        """
+        self.flush_delay = self.FLUSH_DELAY if flush_delay is None else flush_delay
+        self.max_batch = max_batch or self.MAX_BATCH
+
+        self._queue = SimpleQueue()
+        self._condition = Condition()
+        self.thread = None
+
+        # Количество поставленных в очередь и обработанных изменений
+        self._submitted = 0
+        self._processed = 0
+
+        self._batches = 0
+        self._written = 0
+
+    def submit(self, func: Callable[..., Tuple[bool, Optional[str]]], *args, **kwargs) -> Future:
+        """
+        Ставит изменение в очередь.
+
+        :param func: Функция записи базы данных.
+        :param args: Позиционные аргументы функции.
+        :param kwargs: Именованные аргументы функции.
+
+        :return: Future, который получит результат функции после фиксации
+                 транзакции.
+        :rtype: Future
+        """
+        future = Future()
+        with self._condition:
+            if self.thread is None:
+                self.thread = Thread(target=self.run_continuously)
+                self.thread.daemon = True
+                self.thread.start()
+                # Дописываем очередь при штатном завершении, но не ждем
+                # ее бесконечно
+                atexit.register(self.flush, self.EXIT_TIMEOUT)
+
+            self._submitted += 1
+            self._queue.put((future, func, args, kwargs))
+        return future
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """
+        Ожидает обработки всех изменений, поставленных в очередь до вызова.
+
+        :param timeout: Наибольшее время ожидания в секундах.
+
+        :return: False, если время ожидания истекло.
+        :rtype: bool
+        """
+        with self._condition:
+            target = self._submitted
+            return self._condition.wait_for(lambda: self._processed >= target, timeout)
+
+    def stats(self) -> dict:
+        """
+        :return: Словарь с количеством записанных транзакций, изменений и
+                 ожидающих записи изменений.
+        :rtype: dict
+        """
+        return {
+            "batches": self._batches,
+            "written": self._written,
+            "pending": self._queue.qsize(),
+        }
+
+    def run_continuously(self):
+        while True:
+            batch = [self._queue.get()]
+
+            # Даем остальным изменениям серии попасть в ту же транзакцию
+            time.sleep(self.flush_delay)
+            try:
+                while len(batch) < self.max_batch:
+                    batch.append(self._queue.get_nowait())
+            except Empty:
+                pass
+
+            try:
+                # Отмененные изменения пропускаются, остальные больше
+                # нельзя отменить
+                self._write([
+                    item for item in batch
+                    if item[0].set_running_or_notify_cancel()
+                ])
+            except Exception as e:
+                # Поток записи не должен останавливаться: иначе все
+                # следующие изменения никогда не завершатся
+                logger.exception("Ошибка потока записи")
+                for future, *_ in batch:
+                    if not future.done():
+                        future.set_exception(e)
+            finally:
+                with self._condition:
+                    self._processed += len(batch)
+                    self._condition.notify_all()
+
+    def _write(self, batch):
+        if not batch:
+            return
+
+        results = []
+        try:
+            with connection() as conn:
+                # Берем блокировку записи сразу, чтобы пачка не упала на
+                # повышении блокировки чтения до записи
+                conn.execute("BEGIN IMMEDIATE")
+                for future, func, args, kwargs in batch:
+                    results.append(self._call(conn, func, args, kwargs))
+        except sqlite3.Error as e:
+            logger.error("Не удалось записать пачку изменений: %s", e)
+            results = [(False, f"Ошибка базы данных: {e}")] * len(batch)
+        else:
+            self._batches += 1
+            self._written += len(batch)
+
+        for (future, *_), result in zip(batch, results):
+            if isinstance(result, BaseException):
+                future.set_exception(result)
+            else:
+                future.set_result(result)
+
+    @staticmethod
+    def _call(conn: sqlite3.Connection, func, args, kwargs) -> Any:
+        conn.execute("SAVEPOINT write_behind")
+        try:
+            result = func(*args, **kwargs)
+        except Exception as e:
+            result = e
+
+        if isinstance(result, Exception) or (isinstance(result, tuple) and result and not result[0]):
+            conn.execute("ROLLBACK TO write_behind")
+        conn.execute("RELEASE write_behind")
+        return result
+
+
+write_behind = WriteBehindQueue()
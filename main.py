@@ -1,6 +1,9 @@
+from threading import Thread
+
 import flet as ft
 
 from views import MainWindow
+from controllers import restore_reminders, schedule_archiving
 from database import setup_database
 
 
@@ -8,9 +11,15 @@ def main():
     # Создание базы данных и таблиц
     setup_database()
 
+    # Восстановление напоминаний в фоне, чтобы не задерживать первый кадр окна
+    Thread(target=restore_reminders, daemon=True).start()
+
+    # Периодический перенос давно завершенных задач в архив
+    schedule_archiving()
+
     # Запуск приложения flet
     ft.app(target=MainWindow)
 
 
 if __name__ == '__main__':
-    main()
\ No newline at end of file
+    main()
@@ -0,0 +1,130 @@
+"""
+Проверка пакетной записи задач с отключенными построчными триггерами на
+временной базе данных: полнотекстовый индекс должен совпадать с задачами,
+а триггеры не должны оставаться отключенными после ошибки.
+
+Запуск из корня проекта:
+
+    python -m unittest tests.test_bulk_write
+"""
+import os
+import tempfile
+import unittest
+from datetime import datetime
+from unittest import mock
+
+from database import functions
+from database.cache import reference_cache
+from database.connection import connection, connection_manager
+
+ROWS = 100
+
+
+def make_task(number):
+    return {
+        "name": f"Задача {number}",
+        "description": "отчет" if number % 2 else "план",
+        "due_date": datetime(2030, 1, 1),
+        "priority": 1,
+    }
+
+
+class BulkWriteTest(unittest.TestCase):
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+
+        connection_manager.close_all()
+        self.addCleanup(connection_manager.close_all)
+        patcher = mock.patch.object(
+            connection_manager, "database", os.path.join(directory.name, "test.db")
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(reference_cache.invalidate)
+
+        functions.setup_database()
+        reference_cache.invalidate()
+
+        result, self.task_ids = functions.add_tasks_bulk(make_task(number) for number in range(ROWS))
+        self.assertTrue(result, self.task_ids)
+
+    def search_ids(self, query):
+        tasks, _ = functions.search_tasks(query, limit=ROWS * 2)
+        return sorted(task.id for task in tasks)
+
+    def assert_index_consistent(self):
+        with connection() as conn:
+            conn.execute("INSERT INTO tasks_fts (tasks_fts, rank) VALUES ('integrity-check', 1)")
+            self.assertEqual(conn.execute("SELECT COUNT(*) FROM tasks_bulk_insert").fetchone()[0], 0)
+
+    def test_failed_insert_inside_outer_transaction(self):
+        # Ошибка после отключения триггеров, а внешняя транзакция
+        # фиксируется: строка tasks_bulk_insert не должна остаться
+        with connection():
+            result, error = functions.add_tasks_bulk(
+                [make_task(ROWS), dict(make_task(ROWS + 1), name=None)]
+            )
+            self.assertFalse(result, error)
+
+        self.assert_index_consistent()
+        result, task_id = functions.add_task("Новая задача", "сводка", datetime(2030, 1, 1), 1)
+        self.assertTrue(result, task_id)
+        self.assertEqual(self.search_ids("сводка"), [task_id])
+
+    def test_bulk_delete_updates_index(self):
+        deleted = self.task_ids[::3]
+        self.assertEqual(functions.delete_tasks_bulk(deleted), (True, None))
+
+        self.assert_index_consistent()
+        self.assertEqual(sorted(self.search_ids("отчет") + self.search_ids("план")),
+                         sorted(set(self.task_ids) - set(deleted)))
+
+        # Построчный триггер удаления снова работает
+        self.assertEqual(functions.delete_task(self.task_ids[1]), (True, None))
+        self.assert_index_consistent()
+        self.assertNotIn(self.task_ids[1], self.search_ids("отчет"))
+
+    def assert_counts_consistent(self):
+        now = datetime(2030, 1, 1)
+        with connection() as conn:
+            expected = conn.execute("""
+                SELECT c.id, COUNT(t.id),
+                       COALESCE(SUM(s.name = 'Завершена'), 0),
+                       COALESCE(SUM(s.name != 'Завершена' AND t.due_date < ?), 0)
+                FROM categories c
+                LEFT JOIN tasks t ON t.category_id = c.id
+                LEFT JOIN statuses s ON s.id = t.status_id
+                GROUP BY c.id
+                ORDER BY c.id
+                """, (now.strftime("%Y-%m-%d %H:%M:%S"),)).fetchall()
+        summaries = functions.fetch_category_summaries.uncached(now=now, include_archived=False)
+        self.assertEqual(
+            [(summary["category_id"], summary["total"], summary["completed"], summary["overdue"])
+             for summary in summaries],
+            expected
+        )
+
+    def test_category_counts_follow_bulk_writes(self):
+        self.assertEqual(functions.add_category("Работа"), (True, None))
+        reference_cache.invalidate()
+        result, task_ids = functions.add_tasks_bulk(
+            dict(make_task(number), category_name="Работа", status="Завершена" if number % 3 else None,
+                 due_date=datetime(2029 + number % 2, 6, 1))
+            for number in range(ROWS)
+        )
+        self.assertTrue(result, task_ids)
+        self.assert_counts_consistent()
+
+        self.assertEqual(functions.delete_tasks_bulk(task_ids[::4] + self.task_ids[::5]), (True, None))
+        self.assert_counts_consistent()
+
+        # Построчные триггеры изменения и удаления снова работают
+        self.assertEqual(functions.change_task_status(task_ids[1], 1), (True, None))
+        self.assertEqual(functions.delete_task(task_ids[2]), (True, None))
+        self.assert_counts_consistent()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,59 @@
+"""
+Проверка замены зависших потоков пула уведомлений: количество выведенных
+из пула потоков ограничено, а после завершения зависших вызовов пул
+возвращается к исходному размеру.
+
+Запуск из корня проекта:
+
+    python -m unittest tests.test_dispatcher
+"""
+import threading
+import time
+import unittest
+
+from controllers.dispatcher import NotificationDispatcher
+
+TIMEOUT = 0.1
+MAX_ABANDONED = 2
+HUNG_CALLS = 4
+
+
+class AbandonedWorkersTest(unittest.TestCase):
+
+    def wait_for(self, condition, timeout=5.0):
+        deadline = time.monotonic() + timeout
+        while not condition():
+            self.assertLess(time.monotonic(), deadline)
+            time.sleep(TIMEOUT / 4)
+
+    def test_replacement_stops_at_limit(self):
+        dispatcher = NotificationDispatcher(workers=1, timeout=TIMEOUT, max_abandoned=MAX_ABANDONED)
+        released = threading.Event()
+        self.addCleanup(released.set)
+
+        with self.assertLogs("controllers.dispatcher", "WARNING") as logs:
+            for _ in range(HUNG_CALLS):
+                dispatcher.submit(released.wait)
+            self.wait_for(lambda: dispatcher.stats()["abandoned_workers"] == MAX_ABANDONED + 1)
+
+            # Дальше зависшие потоки не заменяются, а выведенные из пула
+            # не считаются занятыми
+            time.sleep(TIMEOUT * 3)
+            stats = dispatcher.stats()
+            self.assertEqual(stats["abandoned_workers"], MAX_ABANDONED + 1)
+            self.assertEqual(stats["busy_workers"], 0)
+            self.assertEqual(stats["queue_depth"], HUNG_CALLS - MAX_ABANDONED - 1)
+        self.assertEqual(sum("не заменен" in line for line in logs.output), 1)
+
+        released.set()
+        self.wait_for(lambda: dispatcher.stats()["completed"] == HUNG_CALLS)
+
+        # Один из потоков вернулся в пул вместо незамененного
+        done = threading.Event()
+        dispatcher.submit(done.set)
+        self.assertTrue(done.wait(5.0))
+        self.assertEqual(dispatcher.stats()["abandoned_workers"], 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
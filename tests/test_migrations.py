@@ -0,0 +1,135 @@
+"""
+Проверка продолжения прерванного заполнения миграции на временной базе
+данных с отдельным списком миграций.
+
+Запуск из корня проекта:
+
+    python -m unittest tests.test_migrations
+"""
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from database import migrations
+from database.connection import connection, connection_manager
+from database.migrations import Migration
+
+ROWS = 1000
+BATCH_SIZE = 100
+
+# Пачка, в которой заполнение прерывается
+FAIL_ABOVE_ID = 550
+
+CREATE_ITEMS = Migration(1, "Таблица items", [
+    "CREATE TABLE items (id INTEGER PRIMARY KEY, value INTEGER NOT NULL, doubled INTEGER)",
+])
+
+# Заполнение прибавляет к doubled, поэтому повторная обработка строки
+# заметна по результату
+FILL_DOUBLED = Migration(2, "Заполнение doubled", [], backfill=("items", """
+    UPDATE items SET doubled = COALESCE(doubled, 0) + checked(id) * 0 + value * 2
+    WHERE id > :low AND id <= :high
+"""))
+
+
+class MigrationResumeTest(unittest.TestCase):
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+
+        connection_manager.close_all()
+        self.addCleanup(connection_manager.close_all)
+        patcher = mock.patch.object(
+            connection_manager, "database", os.path.join(directory.name, "test.db")
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        self.fail_above = None
+        with connection() as conn:
+            conn.create_function("checked", 1, self.checked)
+
+        self.use_migrations([CREATE_ITEMS])
+        migrations.migrate(BATCH_SIZE)
+        with connection() as conn:
+            conn.executemany(
+                "INSERT INTO items (id, value) VALUES (?, ?)",
+                [(item_id, item_id) for item_id in range(1, ROWS + 1)]
+            )
+
+    def checked(self, item_id):
+        if self.fail_above is not None and item_id > self.fail_above:
+            raise ValueError("Заполнение прервано")
+        return item_id
+
+    def use_migrations(self, migration_list):
+        for name, value in (
+                ("MIGRATIONS", migration_list),
+                ("LATEST_VERSION", migration_list[-1].version),
+        ):
+            patcher = mock.patch.object(migrations, name, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def fetch_state(self):
+        with connection() as conn:
+            position, completed_at = conn.execute(
+                "SELECT backfill_position, completed_at FROM schema_version WHERE version = 2"
+            ).fetchone()
+            doubled = dict(conn.execute("SELECT id, doubled FROM items"))
+        return position, completed_at, doubled
+
+    def assert_filled_once(self, doubled):
+        self.assertEqual(doubled, {item_id: item_id * 2 for item_id in range(1, ROWS + 1)})
+
+    def interrupt_backfill(self):
+        self.use_migrations([CREATE_ITEMS, FILL_DOUBLED])
+        self.fail_above = FAIL_ABOVE_ID
+        with self.assertRaises(Exception):
+            migrations.migrate(BATCH_SIZE)
+        self.fail_above = None
+
+        # Зафиксированы только пачки до прерванной
+        position, completed_at, doubled = self.fetch_state()
+        self.assertEqual(position, FAIL_ABOVE_ID // BATCH_SIZE * BATCH_SIZE)
+        self.assertIsNone(completed_at)
+        self.assertEqual(migrations.fetch_schema_version(), (2, True))
+        for item_id, value in doubled.items():
+            self.assertEqual(value, item_id * 2 if item_id <= position else None)
+
+    def test_resume_after_restart(self):
+        self.interrupt_backfill()
+
+        self.assertEqual(migrations.migrate(BATCH_SIZE), 0)
+
+        position, completed_at, doubled = self.fetch_state()
+        self.assertIsNotNone(completed_at)
+        self.assert_filled_once(doubled)
+        self.assertEqual(migrations.fetch_schema_version(), (2, False))
+
+    def test_migration_applied_by_another_process(self):
+        self.interrupt_backfill()
+
+        # Версия схемы прочитана до того, как другое приложение применило
+        # миграцию: она не применяется повторно, а заполнение продолжается
+        with mock.patch.object(migrations, "fetch_schema_version", return_value=(1, False)):
+            self.assertEqual(migrations.migrate(BATCH_SIZE), 0)
+
+        position, completed_at, doubled = self.fetch_state()
+        self.assertIsNotNone(completed_at)
+        self.assert_filled_once(doubled)
+
+    def test_completed_backfill_is_not_repeated(self):
+        self.use_migrations([CREATE_ITEMS, FILL_DOUBLED])
+        self.assertEqual(migrations.migrate(BATCH_SIZE), 1)
+
+        with mock.patch.object(migrations, "fetch_schema_version", return_value=(1, False)):
+            self.assertEqual(migrations.migrate(BATCH_SIZE), 0)
+
+        self.assert_filled_once(self.fetch_state()[2])
+
+
+if __name__ == "__main__":
+    unittest.main()
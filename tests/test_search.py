@@ -0,0 +1,96 @@
+"""
+Проверка постраничного поиска на временной базе данных: совпадения за
+пределами окна ранжирования не должны теряться.
+
+Запуск из корня проекта:
+
+    python -m unittest tests.test_search
+"""
+import os
+import tempfile
+import unittest
+from datetime import datetime
+from unittest import mock
+
+from database import functions
+from database.cache import reference_cache
+from database.connection import connection_manager
+
+ROWS = 250
+WINDOW = 60
+PAGE_SIZE = 17
+
+
+class SearchPagingTest(unittest.TestCase):
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+
+        connection_manager.close_all()
+        self.addCleanup(connection_manager.close_all)
+        patcher = mock.patch.object(
+            connection_manager, "database", os.path.join(directory.name, "test.db")
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(reference_cache.invalidate)
+
+        patcher = mock.patch.object(functions, "SEARCH_RANK_WINDOW", WINDOW)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        functions.setup_database()
+        reference_cache.invalidate()
+
+        # Слово встречается в задаче разное число раз, чтобы релевантность
+        # отличалась от порядка добавления
+        result, self.task_ids = functions.add_tasks_bulk(
+            {
+                "name": f"Задача {number}",
+                "description": " ".join(["отчет"] * (number % 7 + 1) + ["текст"] * (number % 5)),
+                "due_date": datetime(2030, 1, 1),
+                "priority": 1,
+            }
+            for number in range(ROWS)
+        )
+        self.assertTrue(result, self.task_ids)
+
+    def search_all(self, query):
+        pages = []
+        cursor = None
+        while True:
+            tasks, cursor = functions.search_tasks(query, limit=PAGE_SIZE, cursor=cursor)
+            pages.append([task.id for task in tasks])
+            if cursor is None:
+                return pages
+
+    def test_matches_beyond_window_are_returned(self):
+        pages = self.search_all("отч")
+        found = [task_id for page in pages for task_id in page]
+
+        self.assertEqual(len(found), len(set(found)))
+        self.assertEqual(sorted(found), sorted(self.task_ids))
+        self.assertTrue(all(len(page) == PAGE_SIZE for page in pages[:-1]))
+
+        # Сначала самые новые совпадения по релевантности, затем остальные
+        # от новых к старым
+        newest = sorted(self.task_ids, reverse=True)
+        self.assertEqual(sorted(found[:WINDOW]), sorted(newest[:WINDOW]))
+        self.assertEqual(found[WINDOW:], newest[WINDOW:])
+
+    def test_fewer_matches_than_window(self):
+        # Задачи 24 и 240-249: совпадений меньше окна, все упорядочены по
+        # релевантности и не повторяются
+        found = [task_id for page in self.search_all("Задача 24") for task_id in page]
+        expected = [self.task_ids[number] for number in [24] + list(range(240, 250))]
+        self.assertEqual(len(found), len(expected))
+        self.assertEqual(sorted(found), sorted(expected))
+
+        tasks, cursor = functions.search_tasks("Задача 24", limit=len(expected))
+        self.assertEqual([task.id for task in tasks], found)
+        self.assertIsNone(cursor)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,119 @@
+"""
+Проверка иерархического колеса таймеров на случайных расписаниях: колесо
+должно выдавать те же задания, что и мин-куча, и никогда не предлагать
+проснуться позже ближайшего живого срока.
+
+Запуск из корня проекта:
+
+    python -m unittest tests.test_timers
+"""
+import random
+import unittest
+
+from controllers.task_controller import ScheduledJob
+from controllers.timers import HeapTimerQueue, TimingWheel
+
+# Начало отсчета не выровнено по границам минут, часов и дней
+START = 1_700_000_000.25
+
+# Горизонты сроков: текущая минута, час, день, дневной уровень колеса и
+# сроки за его пределами
+HORIZONS = (30, 1800, 20 * 3600, 30 * 86400, 90 * 86400)
+
+
+def noop():
+    pass
+
+
+class TimingWheelEquivalenceTest(unittest.TestCase):
+
+    def setUp(self):
+        self.heap = HeapTimerQueue(now=START)
+        self.wheel = TimingWheel(now=START, days=64)
+        self.heap_jobs = {}
+        self.wheel_jobs = {}
+        self.next_id = 0
+
+    def push(self, deadline):
+        task_id = self.next_id
+        self.next_id += 1
+        for timers, jobs in ((self.heap, self.heap_jobs), (self.wheel, self.wheel_jobs)):
+            job = ScheduledJob(deadline, task_id, noop, (), {})
+            jobs[task_id] = job
+            timers.push(job)
+
+    def cancel(self, task_id):
+        for timers, jobs in ((self.heap, self.heap_jobs), (self.wheel, self.wheel_jobs)):
+            job = jobs.pop(task_id)
+            job.cancelled = True
+            timers.cancel(job)
+
+    def pop_due(self, now):
+        heap_fired = {job.task_id for job in self.heap.pop_due(now)}
+        wheel_fired = {job.task_id for job in self.wheel.pop_due(now)}
+        self.assertEqual(heap_fired, wheel_fired, f"now={now}")
+
+        for task_id in heap_fired:
+            self.assertLessEqual(self.heap_jobs[task_id].deadline, now)
+            del self.heap_jobs[task_id]
+            del self.wheel_jobs[task_id]
+        return heap_fired
+
+    def check_next_deadline(self):
+        live = [job.deadline for job in self.wheel_jobs.values()]
+        next_deadline = self.wheel.next_deadline()
+        if live:
+            self.assertIsNotNone(next_deadline)
+            self.assertLessEqual(next_deadline, min(live))
+            self.assertEqual(self.heap.next_deadline(), min(live))
+        else:
+            self.assertIsNone(self.heap.next_deadline())
+        return next_deadline
+
+    def test_random_steps(self):
+        rng = random.Random(20240501)
+        now = START
+
+        for _ in range(3000):
+            action = rng.random()
+            if action < 0.5:
+                # Среди сроков бывают и уже прошедшие
+                self.push(now + rng.uniform(-5, rng.choice(HORIZONS)))
+            elif action < 0.65 and self.wheel_jobs:
+                self.cancel(rng.choice(list(self.wheel_jobs)))
+            else:
+                # Шаги от долей секунды до нескольких дней, чтобы колесо
+                # проходило и перепрыгивало границы всех уровней
+                now += rng.choice((0.3, 1, 59.5, 61, 3599, 3601, 86399, 86401 * 3)) * rng.random()
+                self.pop_due(now)
+            self.check_next_deadline()
+
+        # Дожидаемся всех оставшихся сроков
+        now = max([now] + [job.deadline for job in self.heap_jobs.values()]) + 1
+        self.pop_due(now)
+        self.assertEqual(len(self.heap_jobs), 0)
+        self.assertEqual(len(self.wheel), 0)
+
+    def test_waking_at_next_deadline_fires_on_time(self):
+        # Планировщик спит до next_deadline колеса, поэтому каждое задание
+        # должно срабатывать ровно в свой срок, а не на следующем пробуждении
+        rng = random.Random(7)
+        for _ in range(2000):
+            self.push(START + rng.uniform(0, rng.choice(HORIZONS)))
+        cancelled = rng.sample(sorted(self.wheel_jobs), 500)
+        for task_id in cancelled:
+            self.cancel(task_id)
+
+        deadlines = {task_id: job.deadline for task_id, job in self.wheel_jobs.items()}
+        fired = set()
+        while self.wheel_jobs:
+            now = self.check_next_deadline()
+            for task_id in self.pop_due(now):
+                self.assertEqual(deadlines[task_id], now)
+                fired.add(task_id)
+
+        self.assertEqual(fired, set(deadlines))
+
+
+if __name__ == "__main__":
+    unittest.main()
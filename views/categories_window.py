@@ -1,8 +1,9 @@
 import flet as ft
 
-from controllers import TaskScheduler
+from controllers import TaskScheduler, reschedule_task_reminder
 from database import add_category, fetch_categories, delete_category, update_category, fetch_tasks, change_task_status, \
-    delete_task
+    complete_task, delete_task, fetch_category_task_ids, write_behind, TASK_PAGE_SIZE, \
+    TASK_LIST_FIELDS
 from utils import show_alert_dialog, close_dialog_and_update, navigate_to_route
 from views.main_window import WIDGET_COLOR, PINK_COLOR
 
@@ -176,7 +177,13 @@ class CategoriesView(ft.Container):
         )
 
     def init_elements(self):
-        self.category = fetch_categories(category_id=self.category_id)[0]
+        # Задачи категории загружаются страницами
+        self.category = fetch_categories(
+            category_id=self.category_id,
+            limit=TASK_PAGE_SIZE,
+            fields=TASK_LIST_FIELDS,
+        )[0]
+        self.next_cursor = self.category["next_cursor"]
 
         # Название раздела
         self.text_section_name = ft.Text(
@@ -386,9 +393,41 @@ class CategoriesView(ft.Container):
 
         if tasks_data:
             self.add_tasks_display(data=tasks_data)
+            self.add_load_more_button()
         else:
             self.add_no_tasks_display()
 
+    def add_load_more_button(self):
+        # Кнопка загрузки следующей страницы задач
+        if self.next_cursor is None:
+            return
+
+        self.task_list.controls.append(
+            ft.Container(
+                width=775,
+                alignment=ft.alignment.center,
+                content=ft.TextButton(
+                    text="Показать еще",
+                    on_click=self.load_more_tasks,
+                ),
+            )
+        )
+
+    def load_more_tasks(self, e):
+        category = fetch_categories(
+            category_id=self.category_id,
+            limit=TASK_PAGE_SIZE,
+            cursor=self.next_cursor,
+            fields=TASK_LIST_FIELDS,
+        )[0]
+        self.next_cursor = category["next_cursor"]
+
+        # Кнопка "Показать еще" - последний элемент списка
+        self.task_list.controls.pop()
+        self.add_tasks_display(data=category["tasks"])
+        self.add_load_more_button()
+        self.page.update()
+
     def add_tasks_display(self, data):
 
         for task in data:
@@ -582,10 +621,18 @@ class CategoriesView(ft.Container):
             self.delete_category_with_tasks(e=None)
 
     def delete_category_with_tasks(self, e):
-        delete_category(
+        # Загружена может быть только первая страница задач, поэтому ID всех
+        # задач для отмены напоминаний запрашиваются до удаления
+        task_ids = fetch_category_task_ids(self.category_id)
+        result, _ = delete_category(
             category_id=self.category_id,
             delete_tasks=True,
         )
+
+        if result:
+            task_scheduler = TaskScheduler()
+            task_scheduler.clear_scheduled_tasks(task_ids)
+
         navigate_to_route(page=self.page, route="/")
 
     def delete_category_without_tasks(self, e):
@@ -706,62 +753,51 @@ class CategoriesView(ft.Container):
         self.bottom_sheet_delete_task.update()
 
     def complete_task(self, e):
-        def close_alert_dialog(e):
-            close_dialog_and_update(dlg=dlg, page=self.page)
-
-        result, error = change_task_status(
-            task_id=self.current_task_id,
-            status_id=3,
-        )
-
-        if result:
-            task_scheduler = TaskScheduler()
-            task_scheduler.clear_scheduled_task(
-                self.current_task_id
-            )
-
-            self.bottom_sheet_complete_task.open = False
-            self.bottom_sheet_complete_task.update()
-
-            self.update_ui()
-
-        else:
-            dlg = show_alert_dialog(
-                page=self.page,
-                title=error,
-                buttons=["Закрыть"],
-                funcs=[close_alert_dialog],
-                alignment=ft.MainAxisAlignment.CENTER
-            )
+        self.bottom_sheet_complete_task.open = False
+        self.bottom_sheet_complete_task.update()
+        self.change_status(complete_task)
 
     def return_task(self, e):
-
         self.bottom_sheet_return_task.open = False
         self.bottom_sheet_return_task.update()
-        def close_alert_dialog(e):
-            close_dialog_and_update(dlg=dlg, page=self.page)
+        self.change_status(change_task_status, status_id=1)
 
-        result, error = change_task_status(
-            task_id=self.current_task_id,
-            status_id=1,
+    def change_status(self, func, **kwargs):
+        # Обработчик не ждет записи, интерфейс обновляется после нее
+        task_id = self.current_task_id
+        future = write_behind.submit(
+            func,
+            task_id=task_id,
+            **kwargs,
+        )
+        future.add_done_callback(
+            lambda future: self.on_status_changed(task_id, future)
         )
 
+    def on_status_changed(self, task_id, future):
+        def close_alert_dialog(e):
+            close_dialog_and_update(dlg=dlg, page=self.page)
 
-        if result:
-            task_scheduler = TaskScheduler()
-            task_scheduler.clear_scheduled_task(
-                self.current_task_id
-            )
+        try:
+            result, error_or_due_date = future.result()
+        except Exception as exception:
+            result, error_or_due_date = False, f"Неизвестная ошибка: {exception}"
 
-            self.bottom_sheet_complete_task.open = False
-            self.bottom_sheet_complete_task.update()
+        if result:
+            # Завершенная повторяющаяся задача перенесена на следующее
+            # повторение, и ее напоминание планируется заново
+            if error_or_due_date is None:
+                task_scheduler = TaskScheduler()
+                task_scheduler.clear_scheduled_task(task_id)
+            else:
+                reschedule_task_reminder(task_id)
 
             self.update_ui()
 
         else:
             dlg = show_alert_dialog(
                 page=self.page,
-                title=error,
+                title=error_or_due_date,
                 buttons=["Закрыть"],
                 funcs=[close_alert_dialog],
                 alignment=ft.MainAxisAlignment.CENTER
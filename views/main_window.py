@@ -1,9 +1,10 @@
 import flet as ft
 
-from controllers import TaskScheduler
+from controllers import TaskScheduler, reschedule_task_reminder
 from database import (
-    fetch_categories,
-    fetch_tasks, change_task_status, delete_task,
+    fetch_category_summaries,
+    fetch_tasks_page, complete_task, delete_task, write_behind,
+    TASK_PAGE_SIZE, TASK_LIST_FIELDS,
 )
 from utils import (
     pluralize_word,
@@ -136,7 +137,7 @@ class MainWindowView(ft.Container):
         # Создание карточки категорий
         self.category_card = ft.Row(scroll="ALWAYS")
 
-        categories = fetch_categories()
+        categories = fetch_category_summaries()
 
         self.category_card.controls.append(
             ft.FloatingActionButton(
@@ -152,7 +153,7 @@ class MainWindowView(ft.Container):
             category_id = category["category_id"]
             category_name = category["category_name"]
 
-            task_count = len(category["tasks"])
+            task_count = category["total"]
             task_word = pluralize_word(word="задание", number=task_count)
 
             self.category_card.controls.append(
@@ -186,13 +187,49 @@ class MainWindowView(ft.Container):
     def create_task_list(self):
         # Создание списка задач
         self.task_list = ft.Column(height=400, scroll="ALWAYS")
-        tasks_data = fetch_tasks(include_completed=False)
+        # Задачи загружаются страницами
+        tasks_data, self.next_cursor = fetch_tasks_page(
+            include_completed=False,
+            limit=TASK_PAGE_SIZE,
+            fields=TASK_LIST_FIELDS,
+        )
 
         if tasks_data:
             self.add_tasks_display(data=tasks_data)
+            self.add_load_more_button()
         else:
             self.add_no_tasks_display()
 
+    def add_load_more_button(self):
+        # Кнопка загрузки следующей страницы задач
+        if self.next_cursor is None:
+            return
+
+        self.task_list.controls.append(
+            ft.Container(
+                width=775,
+                alignment=ft.alignment.center,
+                content=ft.TextButton(
+                    text="Показать еще",
+                    on_click=self.load_more_tasks,
+                ),
+            )
+        )
+
+    def load_more_tasks(self, e):
+        tasks_data, self.next_cursor = fetch_tasks_page(
+            include_completed=False,
+            limit=TASK_PAGE_SIZE,
+            cursor=self.next_cursor,
+            fields=TASK_LIST_FIELDS,
+        )
+
+        # Кнопка "Показать еще" - последний элемент списка
+        self.task_list.controls.pop()
+        self.add_tasks_display(data=tasks_data)
+        self.add_load_more_button()
+        self.page.update()
+
     def add_tasks_display(self, data):
 
         for task in data:
@@ -306,7 +343,17 @@ class MainWindowView(ft.Container):
                     padding=ft.padding.only(top=3, left=250, right=250, bottom=10),
                     content=ft.Column(
                         controls=[
-                            ft.Text(value="Категории:", size=20),
+                            ft.Row(
+                                alignment=ft.MainAxisAlignment.SPACE_BETWEEN,
+                                controls=[
+                                    ft.Text(value="Категории:", size=20),
+                                    ft.IconButton(
+                                        icon=ft.icons.SEARCH,
+                                        tooltip="Поиск задач",
+                                        on_click=lambda _: self.page.go("/search")
+                                    ),
+                                ]
+                            ),
                             ft.Container(content=self.category_card),
                             ft.Container(height=25),
                             ft.Text(value="Задания на сегодня:", size=20),
@@ -328,30 +375,45 @@ class MainWindowView(ft.Container):
         )
 
     def complete_task(self, e):
+        # Запись идет через очередь отложенной записи: изменения, сделанные
+        # подряд, фиксируются одной транзакцией. Обработчик не ждет записи,
+        # а интерфейс обновляется, когда статус уже записан
+        task_id = self.current_task_id
+        future = write_behind.submit(
+            complete_task,
+            task_id=task_id,
+        )
+        future.add_done_callback(
+            lambda future: self.on_task_completed(task_id, future)
+        )
+
+        self.bottom_sheet_complete_task.open = False
+        self.bottom_sheet_complete_task.update()
+
+    def on_task_completed(self, task_id, future):
         def close_alert_dialog(e):
             close_dialog_and_update(dlg=dlg, page=self.page)
 
-        result, error = change_task_status(
-            task_id=self.current_task_id,
-            status_id=3,
-        )
+        try:
+            result, error_or_due_date = future.result()
+        except Exception as exception:
+            result, error_or_due_date = False, f"Неизвестная ошибка: {exception}"
 
         if result:
-            task_scheduler = TaskScheduler()
-            task_scheduler.clear_scheduled_task(
-                self.current_task_id
-            )
-
-            self.bottom_sheet_complete_task.open = False
-            self.bottom_sheet_complete_task.update()
+            # Повторяющаяся задача перенесена на следующее повторение, и
+            # ее напоминание планируется заново
+            if error_or_due_date is None:
+                task_scheduler = TaskScheduler()
+                task_scheduler.clear_scheduled_task(task_id)
+            else:
+                reschedule_task_reminder(task_id)
 
             self.update_ui()
 
-
         else:
             dlg = show_alert_dialog(
                 page=self.page,
-                title=error,
+                title=error_or_due_date,
                 buttons=["Закрыть"],
                 funcs=[close_alert_dialog],
                 alignment=ft.MainAxisAlignment.CENTER
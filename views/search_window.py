@@ -0,0 +1,223 @@
+from threading import Lock, Timer
+
+import flet as ft
+
+from database import search_tasks, TASK_PAGE_SIZE, TASK_LIST_FIELDS
+from views.main_window import WIDGET_COLOR, PINK_COLOR
+
+
+class SearchView(ft.Container):
+    # Пауза ввода в секундах, после которой выполняется поиск
+    SEARCH_DELAY = 0.3
+
+    # Поля задач, которые показываются в результатах
+    FIELDS = TASK_LIST_FIELDS + ("category",)
+
+    def __init__(self, page):
+        super().__init__()
+        self.page = page
+
+        self.query = ""
+        self.next_cursor = None
+
+        # Поиск выполняется по таймеру, который перезапускается при каждом
+        # изменении текста. Номер запроса отбрасывает результаты поиска,
+        # завершившегося после того, как текст снова изменился
+        self._lock = Lock()
+        self._timer = None
+        self._generation = 0
+
+        self.setup_ui()
+
+    def setup_ui(self):
+        # Инициализация элементов интерфейса
+        self.init_elements()
+
+        self.create_search_page()
+
+        self.content = ft.Stack(
+            controls=[
+                self.search_page,
+                self.container_back_button,
+            ]
+        )
+
+    def init_elements(self):
+        # Название раздела
+        self.container_section_name = ft.Container(
+            padding=ft.padding.only(
+                top=30,
+            ),
+            alignment=ft.alignment.center,
+            content=ft.Text(
+                value="Поиск задач",
+                size=30
+            ),
+        )
+
+        # Текстовое поле для ввода запроса
+        self.text_field_query = ft.TextField(
+            label="Введите слова из названия или описания задачи",
+            prefix_icon=ft.icons.SEARCH,
+            autofocus=True,
+            on_change=self.on_text_changed,
+        )
+
+        # Кнопка назад
+        self.container_back_button = ft.Container(
+            padding=ft.padding.only(
+                top=10,
+                left=5,
+                right=5,
+                bottom=10
+            ),
+            on_click=lambda _: self.page.go("/"),
+            content=ft.Icon(
+                name=ft.icons.ARROW_BACK_IOS_NEW_ROUNDED,
+            ),
+        )
+
+        # Список найденных задач
+        self.task_list = ft.Column(height=450, scroll="ALWAYS")
+
+    def create_search_page(self):
+        self.search_page = ft.Row(
+            controls=[
+                ft.Container(
+                    width=1280,
+                    padding=ft.padding.only(
+                        top=3,
+                        left=250,
+                        right=250,
+                        bottom=10
+                    ),
+                    content=ft.Column(
+                        controls=[
+                            self.container_section_name,
+                            ft.Container(height=20),
+                            self.text_field_query,
+                            ft.Container(height=20),
+                            self.task_list,
+                        ]
+                    )
+                ),
+            ]
+        )
+
+    def on_text_changed(self, e):
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+
+            self._generation += 1
+            self._timer = Timer(
+                self.SEARCH_DELAY,
+                self.run_search,
+                args=(self.text_field_query.value, self._generation),
+            )
+            self._timer.daemon = True
+            self._timer.start()
+
+    def run_search(self, query, generation):
+        tasks, next_cursor = search_tasks(
+            query,
+            limit=TASK_PAGE_SIZE,
+            fields=self.FIELDS,
+        )
+
+        with self._lock:
+            if generation != self._generation:
+                return
+            self.query = query
+            self.next_cursor = next_cursor
+
+        self.task_list.controls.clear()
+        if tasks:
+            self.add_tasks_display(data=tasks)
+            self.add_load_more_button()
+        elif query.strip():
+            self.add_no_tasks_display()
+        self.page.update()
+
+    def add_load_more_button(self):
+        # Кнопка загрузки следующей страницы результатов
+        if self.next_cursor is None:
+            return
+
+        self.task_list.controls.append(
+            ft.Container(
+                width=775,
+                alignment=ft.alignment.center,
+                content=ft.TextButton(
+                    text="Показать еще",
+                    on_click=self.load_more_tasks,
+                ),
+            )
+        )
+
+    def load_more_tasks(self, e):
+        tasks, self.next_cursor = search_tasks(
+            self.query,
+            limit=TASK_PAGE_SIZE,
+            cursor=self.next_cursor,
+            fields=self.FIELDS,
+        )
+
+        # Кнопка "Показать еще" - последний элемент списка
+        self.task_list.controls.pop()
+        self.add_tasks_display(data=tasks)
+        self.add_load_more_button()
+        self.page.update()
+
+    def add_tasks_display(self, data):
+        for task in data:
+            self.task_list.controls.append(
+                ft.Container(
+                    on_click=lambda _, _id=task["id"]: self.page.go(f'/task/{_id}'),
+                    height=80,
+                    width=775,
+                    bgcolor=WIDGET_COLOR,
+                    border_radius=20,
+                    padding=ft.padding.only(
+                        top=20, left=20,
+                        right=20, bottom=20
+                    ),
+                    content=ft.Row(
+                        controls=[
+                            ft.Container(
+                                width=500,
+                                height=40,
+                                content=ft.Text(
+                                    value=task["name"],
+                                    font_family='poppins',
+                                    size=25,
+                                    weight=ft.FontWeight.W_300,
+                                )
+                            ),
+                            ft.Container(
+                                width=200,
+                                content=ft.Text(
+                                    value=task["category"],
+                                    color=PINK_COLOR,
+                                    size=18,
+                                )
+                            ),
+                        ]
+                    )
+                ),
+            )
+
+    def add_no_tasks_display(self):
+        self.task_list.controls.append(
+            ft.Container(
+                height=65,
+                width=775,
+                alignment=ft.alignment.center,
+                content=ft.Text(
+                    value="Ничего не найдено",
+                    weight=ft.FontWeight.BOLD,
+                    color=ft.colors.GREY,
+                    size=28
+                ),
+            )
+        )
@@ -2,15 +2,60 @@ import datetime
 
 import flet as ft
 
-from controllers import TaskScheduler
-from database import add_task, fetch_categories, fetch_tasks, update_task, fetch_statuses
+from controllers import TaskScheduler, schedule_task_reminder
+from database import (
+    add_task,
+    fetch_category_names,
+    fetch_tasks,
+    update_task,
+    fetch_statuses,
+    set_task_recurrence,
+    fetch_task_recurrence,
+    RecurrenceRule,
+)
 from utils import (
     show_alert_dialog,
-    send_notification,
     close_dialog_and_update,
     navigate_to_route,
 )
 
+# Варианты повторения задачи, доступные в форме: частота, интервал и
+# маска дней недели
+RECURRENCE_OPTIONS = {
+    "Не повторять": None,
+    "Каждый час": (RecurrenceRule.HOURLY, 1, 0),
+    "Каждый день": (RecurrenceRule.DAILY, 1, 0),
+    "По будням": (RecurrenceRule.DAILY, 1, RecurrenceRule.WEEKDAYS),
+    "Каждую неделю": (RecurrenceRule.WEEKLY, 1, 0),
+    "Каждый месяц": (RecurrenceRule.MONTHLY, 1, 0),
+}
+
+
+def create_recurrence_rule(option):
+    params = RECURRENCE_OPTIONS.get(option)
+    return RecurrenceRule(*params) if params else None
+
+
+def find_recurrence_option(rule):
+    if rule is None:
+        return "Не повторять"
+    for option, params in RECURRENCE_OPTIONS.items():
+        if params and RecurrenceRule(*params) == rule:
+            return option
+    # Правило задано не из формы: оставляем его без изменений
+    return None
+
+
+def create_recurrence_dropdown(value):
+    return ft.Dropdown(
+        label="Повтор",
+        options=[
+            ft.dropdown.Option(option)
+            for option in RECURRENCE_OPTIONS
+        ],
+        value=value,
+    )
+
 
 class CreateTaskView(ft.Container):
     def __init__(self, page):
@@ -140,11 +185,12 @@ class CreateTaskView(ft.Container):
             label="Категория",
             hint_text="Неопределенные",
             options=[
-                ft.dropdown.Option(category["category_name"])
-                for category in fetch_categories()
+                ft.dropdown.Option(category_name)
+                for category_name in fetch_category_names()
             ],
             value=None
         )
+        self.dropdown_recurrence = create_recurrence_dropdown("Не повторять")
 
         # Формирование страницы создания задачи
         self.row_task_form = self.create_task_form()
@@ -207,6 +253,9 @@ class CreateTaskView(ft.Container):
                             self.dropdown_category,
                             ft.Container(height=15),
 
+                            self.dropdown_recurrence,
+                            ft.Container(height=15),
+
                             ft.Row(
                                 alignment="CENTER",
                                 controls=[
@@ -294,14 +343,22 @@ class CreateTaskView(ft.Container):
                 category_name=task_category,
             )
 
+            recurrence_rule = create_recurrence_rule(self.dropdown_recurrence.value)
+            if result and recurrence_rule:
+                task_id = error_or_task_id
+                result, error = set_task_recurrence(
+                    task_id=task_id,
+                    rule=recurrence_rule,
+                )
+                error_or_task_id = error or task_id
+
             if result:
-                task_scheduler = TaskScheduler()
-                task_scheduler.schedule_task(
+                schedule_task_reminder(
                     error_or_task_id,
                     task_due_date,
-                    send_notification,
-                    "Напоминание",
                     task_name,
+                    task_category,
+                    recurrence_rule,
                 )
 
                 dlg = show_alert_dialog(
@@ -458,8 +515,8 @@ class EditTaskView(ft.Container):
             label="Категория",
             hint_text=self.task_data["category"],
             options=[
-                ft.dropdown.Option(category["category_name"])
-                for category in fetch_categories()
+                ft.dropdown.Option(category_name)
+                for category_name in fetch_category_names()
             ],
             value=self.task_data["category"]
         )
@@ -472,6 +529,9 @@ class EditTaskView(ft.Container):
             ],
             value=self.task_data["status"]
         )
+        self.dropdown_recurrence = create_recurrence_dropdown(
+            find_recurrence_option(fetch_task_recurrence(self.task_id))
+        )
 
         # Формирование страницы создания задачи
         self.row_task_form = self.create_task_form()
@@ -551,6 +611,9 @@ class EditTaskView(ft.Container):
                             self.dropdown_category,
                             ft.Container(height=15),
 
+                            self.dropdown_recurrence,
+                            ft.Container(height=15),
+
                             self.dropdown_status,
                             ft.Container(height=15),
 
@@ -626,17 +689,24 @@ class EditTaskView(ft.Container):
                 category_name=task_category,
             )
 
+            recurrence_option = self.dropdown_recurrence.value
+            if result and recurrence_option is not None:
+                result, error = set_task_recurrence(
+                    task_id=self.task_id,
+                    rule=create_recurrence_rule(recurrence_option),
+                )
+
             if result:
                 task_scheduler = TaskScheduler()
                 task_scheduler.clear_scheduled_task(
                     self.task_id
                 )
-                task_scheduler.schedule_task(
+                schedule_task_reminder(
                     self.task_id,
                     task_due_date,
-                    send_notification,
-                    "Напоминание",
                     task_name,
+                    task_category,
+                    fetch_task_recurrence(self.task_id),
                 )
 
                 dlg = show_alert_dialog(
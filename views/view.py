@@ -7,6 +7,7 @@ from .categories_window import (
     CreateCategoriesView,
     CategoriesView,
 )
+from .search_window import SearchView
 
 import flet as ft
 
@@ -56,6 +57,16 @@ def MainWindow(page: ft.Page):
                 ),
             )
 
+        elif object_route.route == "/search":
+            page.views.append(
+                ft.View(
+                    route=page.route,
+                    controls=[
+                        SearchView(page=page)
+                    ]
+                ),
+            )
+
         elif object_route.route.startswith("/category/"):
             category_id = object_route.route.split("/")[2]
 